@@ -20,6 +20,97 @@ class Settings(BaseSettings):
     frontend_url: str = "http://localhost:5173"
     environment: str = "development"
 
+    # Worker
+    worker_processes: int = 1
+    worker_concurrency: int = 4
+    job_poll_interval_seconds: float = 2.0
+    job_lease_seconds: int = 300
+    job_max_attempts: int = 3
+
+    # Provider HTTP connection pools
+    http_max_connections_per_host: int = 20
+    http_max_keepalive_per_host: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+
+    # GLiNER2: "remote" (Pioneer API), "local" (in-process model) or "auto"
+    fastino_backend: str = "auto"
+    gliner_model: str = "fastino/gliner2-base-v1"
+    gliner_batch_size: int = 8
+    gliner_batch_wait_ms: int = 10
+
+    # GLiNER2 extraction windows
+    fastino_window_chars: int = 2000
+    fastino_window_overlap_sentences: int = 1
+    fastino_max_concurrency: int = 4
+
+    # Transcription: "modulate" (the voice stage's Velma-2 utterances), "local"
+    # (faster-whisper process pool), "stub" (deterministic stand-in) or "auto"
+    transcription_backend: str = "auto"
+    transcription_chunk_seconds: float = 30.0
+    transcription_max_chunk_seconds: float = 60.0
+    transcription_local_workers: int = 2
+    whisper_model: str = "base"
+
+    # Reka visual stage: "video" (Vision API upload + Q&A) or "frames" (per-frame chat)
+    reka_visual_source: str = "video"
+    reka_frame_concurrency: int = 8
+    reka_frame_retries: int = 3
+
+    # Media preparation time limits: the streaming download+decode pass gets
+    # both budgets, and each grows per minute of probed duration
+    media_download_timeout_seconds: float = 300
+    media_decode_timeout_seconds: float = 240
+    media_timeout_per_minute_seconds: float = 10
+
+    # Frames: "interval" (fixed fps) or "scene" (ffmpeg scene-cut detection)
+    frame_sampling_mode: str = "interval"
+    frame_interval_seconds: float = 30
+    frame_scene_threshold: float = 0.3
+    frame_min_spacing_seconds: float = 2.0
+    frame_max_spacing_seconds: float = 120.0
+    frame_budget: int = 120
+    # Max dHash bit distance for two frames to count as the same shot
+    frame_dedup_max_distance: int = 6
+
+    # Live mode: window length, when to stop once the stream goes quiet, and
+    # a hard cap. file: sources let a local (growing) file stand in for a
+    # stream; keep them off wherever the API is reachable by others.
+    live_window_seconds: float = 30.0
+    live_idle_timeout_seconds: float = 90.0
+    live_max_duration_seconds: float = 4 * 3600
+    live_allow_file_sources: bool = False
+
+    # Result cache (0 disables expiry)
+    result_cache_ttl_hours: int = 168
+
+    # Completed analyses served from memory with ETags (per API process)
+    analysis_cache_entries: int = 256
+    analysis_cache_max_bytes: int = 64 * 1024 * 1024
+    analysis_cache_max_age_seconds: int = 86400
+
+    # Progress events: how often the API tails analysis_events for SSE
+    # subscribers, and the keepalive interval on idle streams
+    events_poll_interval_seconds: float = 0.5
+    sse_heartbeat_seconds: float = 15.0
+    # Events of a finished analysis are deleted once it has been quiet this long
+    events_retention_seconds: int = 3600
+
+    # Async task polling (Reka video indexing, Yutori research)
+    poll_initial_delay_seconds: float = 1.0
+    poll_max_delay_seconds: float = 15.0
+    reka_vision_poll_deadline_seconds: float = 600.0
+    yutori_poll_deadline_seconds: float = 600.0
+
+    # Yutori fact-checking: research task creation quota, split evenly across
+    # WORKER_PROCESSES; the in-flight cap is per process
+    yutori_requests_per_minute: float = 60.0
+    yutori_burst: int = 10
+    yutori_max_in_flight: int = 8
+    # Fact-check verdict cache shared across analyses (0 disables expiry)
+    fact_check_cache_ttl_hours: int = 720
+    # Min MinHash Jaccard similarity for two claims to be checked once (0 disables)
+    claim_cluster_threshold: float = 0.7
+
     class Config:
         env_file = str(ENV_FILE)
 
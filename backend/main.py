@@ -4,8 +4,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import settings
-from models.database import init_db
+from models.database import async_engine, init_db
 from routers import analysis, health
+from services import events, http_clients
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,12 +35,21 @@ app.include_router(analysis.router)
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     logger.info("Initializing database...")
     init_db()
+    await http_clients.init_clients()
+    await events.bus.start()
     logger.info("EchoMind API started")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await events.bus.stop()
+    await http_clients.close_clients()
+    await async_engine.dispose()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,152 @@
+"""Baseline schema
+
+Everything the app created with metadata.create_all() before migrations
+existed. Tables that are already present are left alone (and `analyses` gets
+any cache-key columns it is missing), so databases created by create_all()
+adopt Alembic without being rebuilt.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_tables() -> set[str]:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _uuid_pk() -> sa.Column:
+    return sa.Column("id", sa.String(36), primary_key=True)
+
+
+def _analysis_fk() -> sa.Column:
+    return sa.Column("analysis_id", sa.String(36), sa.ForeignKey("analyses.id"), nullable=False)
+
+
+def upgrade() -> None:
+    existing = _existing_tables()
+
+    if "analyses" not in existing:
+        op.create_table(
+            "analyses",
+            _uuid_pk(),
+            sa.Column("title", sa.Text()),
+            sa.Column("source_url", sa.Text()),
+            sa.Column("source_key", sa.String(255)),
+            sa.Column("media_hash", sa.String(64)),
+            sa.Column("status", sa.String(20)),
+            sa.Column("summary", sa.Text()),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("completed_at", sa.DateTime()),
+        )
+    else:
+        columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("analyses")}
+        if "source_key" not in columns:
+            op.add_column("analyses", sa.Column("source_key", sa.String(255)))
+        if "media_hash" not in columns:
+            op.add_column("analyses", sa.Column("media_hash", sa.String(64)))
+
+    if "entities" not in existing:
+        op.create_table(
+            "entities",
+            _uuid_pk(),
+            _analysis_fk(),
+            sa.Column("name", sa.Text(), nullable=False),
+            sa.Column("entity_type", sa.String(50)),
+            sa.Column("context", sa.Text()),
+            sa.Column("confidence", sa.Float()),
+        )
+
+    if "voice_segments" not in existing:
+        op.create_table(
+            "voice_segments",
+            _uuid_pk(),
+            _analysis_fk(),
+            sa.Column("start_time", sa.Float()),
+            sa.Column("end_time", sa.Float()),
+            sa.Column("speaker", sa.String(100)),
+            sa.Column("confidence_score", sa.Float()),
+            sa.Column("tone", sa.String(50)),
+            sa.Column("transcript", sa.Text()),
+        )
+
+    if "visual_segments" not in existing:
+        op.create_table(
+            "visual_segments",
+            _uuid_pk(),
+            _analysis_fk(),
+            sa.Column("timestamp", sa.Float()),
+            sa.Column("frame_url", sa.Text()),
+            sa.Column("description", sa.Text()),
+            sa.Column("content_type", sa.String(50)),
+        )
+
+    if "fact_checks" not in existing:
+        op.create_table(
+            "fact_checks",
+            _uuid_pk(),
+            _analysis_fk(),
+            sa.Column("claim", sa.Text(), nullable=False),
+            sa.Column("verdict", sa.String(30)),
+            sa.Column("evidence", sa.Text()),
+            sa.Column("sources", sa.Text()),
+        )
+
+    if "frame_analysis_cache" not in existing:
+        op.create_table(
+            "frame_analysis_cache",
+            sa.Column("frame_hash", sa.String(16), primary_key=True),
+            sa.Column("description", sa.Text()),
+            sa.Column("content_type", sa.String(50)),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+
+    if "fact_check_cache" not in existing:
+        op.create_table(
+            "fact_check_cache",
+            sa.Column("fingerprint", sa.String(64), primary_key=True),
+            sa.Column("claim", sa.Text(), nullable=False),
+            sa.Column("verdict", sa.String(30)),
+            sa.Column("evidence", sa.Text()),
+            sa.Column("sources", sa.Text()),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+
+    if "jobs" not in existing:
+        op.create_table(
+            "jobs",
+            _uuid_pk(),
+            _analysis_fk(),
+            sa.Column("source_url", sa.Text(), nullable=False),
+            sa.Column("force_refresh", sa.Boolean()),
+            sa.Column("status", sa.String(20)),
+            sa.Column("attempts", sa.Integer()),
+            sa.Column("worker_id", sa.String(100)),
+            sa.Column("error", sa.Text()),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("locked_at", sa.DateTime()),
+            sa.Column("finished_at", sa.DateTime()),
+        )
+
+
+def downgrade() -> None:
+    for table in (
+        "jobs",
+        "fact_check_cache",
+        "frame_analysis_cache",
+        "fact_checks",
+        "visual_segments",
+        "voice_segments",
+        "entities",
+        "analyses",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,39 @@
+"""Indexes for result lookups, list pagination, cache keys and the job queue
+
+Child tables are read by analysis_id; voice and visual segments come back in
+time order, so their indexes lead with analysis_id and include the time
+column. (created_at, id) backs keyset pagination of /api/analyses.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_analyses_created_at_id", "analyses", ["created_at", "id"]),
+    ("ix_analyses_source_key", "analyses", ["source_key"]),
+    ("ix_analyses_media_hash", "analyses", ["media_hash"]),
+    ("ix_entities_analysis_id", "entities", ["analysis_id"]),
+    ("ix_voice_segments_analysis_id_start_time", "voice_segments", ["analysis_id", "start_time"]),
+    ("ix_visual_segments_analysis_id_timestamp", "visual_segments", ["analysis_id", "timestamp"]),
+    ("ix_fact_checks_analysis_id", "fact_checks", ["analysis_id"]),
+    ("ix_jobs_status_created_at", "jobs", ["status", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,35 @@
+"""Analysis progress events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("analysis_id", sa.String(36), sa.ForeignKey("analyses.id"), nullable=False),
+        sa.Column("event", sa.String(50), nullable=False),
+        sa.Column("stage", sa.String(50)),
+        sa.Column("data", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_analysis_events_analysis_id_id", "analysis_events", ["analysis_id", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analysis_events_analysis_id_id", table_name="analysis_events")
+    op.drop_table("analysis_events")
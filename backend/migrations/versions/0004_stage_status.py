@@ -0,0 +1,24 @@
+"""Per-stage status on analyses
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("analyses", sa.Column("stage_status", sa.JSON()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("stage_status")
@@ -0,0 +1,26 @@
+"""Flag analyses that fell back to mock data
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "analyses", sa.Column("used_mock_data", sa.Boolean(), server_default=sa.false())
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("used_mock_data")
@@ -0,0 +1,29 @@
+"""Store the yt-dlp extractor key beside the normalized URL key
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("analyses", sa.Column("extractor_key", sa.String(255)))
+    op.create_index("ix_analyses_extractor_key", "analyses", ["extractor_key"])
+    # Older rows may hold a generic-extractor key (a bare file name) in
+    # source_key; drop those so they can't match an unrelated upload
+    op.execute("UPDATE analyses SET source_key = NULL WHERE source_key LIKE 'generic:%'")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analyses_extractor_key", table_name="analyses")
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_column("extractor_key")
@@ -1,19 +1,28 @@
 import uuid
+from pathlib import Path
 
 from sqlalchemy import (
+    Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
+    Integer,
+    JSON,
     String,
     Text,
     create_engine,
     func,
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, relationship, sessionmaker
 
 from config import settings
 
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
 
 class Base(DeclarativeBase):
     pass
@@ -21,11 +30,24 @@ class Base(DeclarativeBase):
 
 class Analysis(Base):
     __tablename__ = "analyses"
+    __table_args__ = (
+        Index("ix_analyses_created_at_id", "created_at", "id"),
+        Index("ix_analyses_source_key", "source_key"),
+        Index("ix_analyses_extractor_key", "extractor_key"),
+        Index("ix_analyses_media_hash", "media_hash"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(Text)
     source_url = Column(Text)
+    source_key = Column(String(255))  # normalized URL (youtube:<id> for YouTube)
+    extractor_key = Column(String(255))  # yt-dlp extractor:video_id, not for direct links
+    media_hash = Column(String(64))  # sha256 of the downloaded media
     status = Column(String(20), default="processing")
+    # {"visual": "pending" | "completed", ...} for each stage with result rows
+    stage_status = Column(JSON)
+    # Some stage ran on mock/fallback data; such runs are never reused from cache
+    used_mock_data = Column(Boolean, default=False)
     summary = Column(Text)
     created_at = Column(DateTime, server_default=func.now())
     completed_at = Column(DateTime)
@@ -38,6 +60,9 @@ class Analysis(Base):
 
 class Entity(Base):
     __tablename__ = "entities"
+    __table_args__ = (
+        Index("ix_entities_analysis_id", "analysis_id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     analysis_id = Column(String(36), ForeignKey("analyses.id"), nullable=False)
@@ -51,6 +76,9 @@ class Entity(Base):
 
 class VoiceSegment(Base):
     __tablename__ = "voice_segments"
+    __table_args__ = (
+        Index("ix_voice_segments_analysis_id_start_time", "analysis_id", "start_time"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     analysis_id = Column(String(36), ForeignKey("analyses.id"), nullable=False)
@@ -66,6 +94,9 @@ class VoiceSegment(Base):
 
 class VisualSegment(Base):
     __tablename__ = "visual_segments"
+    __table_args__ = (
+        Index("ix_visual_segments_analysis_id_timestamp", "analysis_id", "timestamp"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     analysis_id = Column(String(36), ForeignKey("analyses.id"), nullable=False)
@@ -79,6 +110,9 @@ class VisualSegment(Base):
 
 class FactCheck(Base):
     __tablename__ = "fact_checks"
+    __table_args__ = (
+        Index("ix_fact_checks_analysis_id", "analysis_id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     analysis_id = Column(String(36), ForeignKey("analyses.id"), nullable=False)
@@ -90,17 +124,104 @@ class FactCheck(Base):
     analysis = relationship("Analysis", back_populates="fact_checks")
 
 
+class FrameAnalysisCache(Base):
+    __tablename__ = "frame_analysis_cache"
+
+    frame_hash = Column(String(16), primary_key=True)  # 64-bit dHash, hex
+    description = Column(Text)
+    content_type = Column(String(50))
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class FactCheckCache(Base):
+    __tablename__ = "fact_check_cache"
+
+    fingerprint = Column(String(64), primary_key=True)  # sha256 of the normalized claim
+    claim = Column(Text, nullable=False)
+    verdict = Column(String(30))
+    evidence = Column(Text)
+    sources = Column(Text)  # JSON string
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class AnalysisEvent(Base):
+    """Progress events written by the pipeline and relayed to SSE clients by the API."""
+
+    __tablename__ = "analysis_events"
+    __table_args__ = (
+        Index("ix_analysis_events_analysis_id_id", "analysis_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    analysis_id = Column(String(36), ForeignKey("analyses.id"), nullable=False)
+    event = Column(String(50), nullable=False)
+    stage = Column(String(50))
+    data = Column(Text)  # JSON string
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    analysis_id = Column(String(36), ForeignKey("analyses.id"), nullable=False)
+    source_url = Column(Text, nullable=False)
+    force_refresh = Column(Boolean, default=False)
+    live = Column(Boolean, default=False)  # rolling-window analysis of a stream
+    status = Column(String(20), default="queued")  # queued | running | completed | failed
+    attempts = Column(Integer, default=0)
+    worker_id = Column(String(100))
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    locked_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+
+def async_database_url(url: str) -> str:
+    """The async-driver form of a sync database URL: asyncpg for PostgreSQL, aiosqlite for SQLite."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ("postgresql", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg spells libpq's sslmode as ssl
+        if "sslmode" in parsed.query:
+            query = dict(parsed.query)
+            query["ssl"] = query.pop("sslmode")
+            parsed = parsed.set(query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Sync engine: migrations, and blocking work already pushed to threads
+# (job queue, frame/fact caches)
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: API request handlers and the pipeline on the worker's event loop
+async_engine = create_async_engine(async_database_url(settings.database_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Bring the schema up to the latest Alembic revision.
+
+    Safe to call from every process on startup: applied revisions are skipped,
+    and databases created by the old create_all() are adopted by the baseline.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
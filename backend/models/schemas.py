@@ -6,6 +6,8 @@ from pydantic import BaseModel
 
 class AnalyzeRequest(BaseModel):
     url: str
+    force_refresh: bool = False
+    live: bool = False
 
 
 class AnalyzeResponse(BaseModel):
@@ -64,6 +66,7 @@ class AnalysisOut(BaseModel):
     title: Optional[str] = None
     source_url: Optional[str] = None
     status: str
+    stage_status: Optional[dict[str, str]] = None
     summary: Optional[str] = None
     created_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -76,6 +79,26 @@ class AnalysisOut(BaseModel):
         from_attributes = True
 
 
+class AnalysisSummaryOut(BaseModel):
+    """List view of an analysis: row counts instead of the result rows themselves."""
+
+    id: str
+    title: Optional[str] = None
+    source_url: Optional[str] = None
+    status: str
+    stage_status: Optional[dict[str, str]] = None
+    summary: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    entity_count: int = 0
+    voice_segment_count: int = 0
+    visual_segment_count: int = 0
+    fact_check_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+
 class StatusOut(BaseModel):
     id: str
     status: str
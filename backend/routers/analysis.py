@@ -1,11 +1,32 @@
+import asyncio
+import json
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from models.database import Analysis, get_db
-from models.schemas import AnalysisOut, AnalyzeRequest, AnalyzeResponse, StatusOut
-from services.orchestrator import run_analysis_pipeline
+from config import settings
+from models.database import (
+    Analysis,
+    AsyncSessionLocal,
+    Entity,
+    FactCheck,
+    VisualSegment,
+    VoiceSegment,
+    get_async_db,
+)
+from models.schemas import (
+    AnalysisOut,
+    AnalysisSummaryOut,
+    AnalyzeRequest,
+    AnalyzeResponse,
+    StatusOut,
+)
+from services import events, job_queue, response_cache, result_cache
 
 logger = logging.getLogger(__name__)
 
@@ -15,30 +36,125 @@ router = APIRouter(prefix="/api")
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def create_analysis(
     request: AnalyzeRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    analysis = Analysis(source_url=request.url, title=f"Analysis of {request.url[:60]}")
+    if request.live:
+        return await _create_live_analysis(request, db)
+
+    source_key = result_cache.normalize_url(request.url)
+    analysis = Analysis(
+        source_url=request.url,
+        source_key=source_key,
+        title=f"Analysis of {request.url[:60]}",
+    )
     db.add(analysis)
-    db.commit()
-    db.refresh(analysis)
+    await db.flush()
+
+    def _clone_cached(sync_db: Session) -> bool:
+        cached = result_cache.find_cached(sync_db, source_keys=[source_key])
+        if cached:
+            result_cache.clone_analysis(sync_db, cached, analysis)
+        return cached is not None
 
-    background_tasks.add_task(run_analysis_pipeline, analysis.id, request.url)
+    if not request.force_refresh and await db.run_sync(_clone_cached):
+        await db.commit()
+        return AnalyzeResponse(analysis_id=analysis.id, status="completed")
+
+    # The worker process picks this up; the API never runs the pipeline itself.
+    await db.run_sync(
+        job_queue.enqueue, analysis.id, request.url, force_refresh=request.force_refresh
+    )
+    await db.commit()
 
     return AnalyzeResponse(analysis_id=analysis.id, status="processing")
 
 
+LIVE_SCHEMES = ("http://", "https://", "rtmp://", "rtmps://", "srt://")
+
+
+async def _create_live_analysis(request: AnalyzeRequest, db: AsyncSession) -> AnalyzeResponse:
+    """Queue a rolling-window analysis of a stream. Never served from cache."""
+    schemes = LIVE_SCHEMES + (("file:",) if settings.live_allow_file_sources else ())
+    if not request.url.startswith(schemes):
+        raise HTTPException(status_code=400, detail="Unsupported live stream URL")
+
+    analysis = Analysis(source_url=request.url, title=f"Live analysis of {request.url[:60]}")
+    db.add(analysis)
+    await db.flush()
+    await db.run_sync(job_queue.enqueue, analysis.id, request.url, live=True)
+    await db.commit()
+    return AnalyzeResponse(analysis_id=analysis.id, status="processing")
+
+
+# Load every result table with one IN query each instead of lazily per row
+WITH_RESULTS = [
+    selectinload(Analysis.entities),
+    selectinload(Analysis.voice_segments),
+    selectinload(Analysis.visual_segments),
+    selectinload(Analysis.fact_checks),
+]
+
+# Child table -> AnalysisSummaryOut count field
+RESULT_COUNTS = {
+    Entity: "entity_count",
+    VoiceSegment: "voice_segment_count",
+    VisualSegment: "visual_segment_count",
+    FactCheck: "fact_check_count",
+}
+
+
 @router.get("/analysis/{analysis_id}", response_model=AnalysisOut)
-def get_analysis(analysis_id: str, db: Session = Depends(get_db)):
-    analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
-    if not analysis:
+async def get_analysis(
+    analysis_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Full analysis with every result row.
+
+    Completed analyses carry a strong ETag and are served from an in-process
+    LRU of serialized JSON; a matching If-None-Match gets a 304 after a
+    single primary-key lookup. In-progress analyses are never cached and
+    return whichever stages have been stored so far (see `stage_status`).
+    """
+    version = (
+        await db.execute(
+            select(Analysis.status, Analysis.completed_at).where(Analysis.id == analysis_id)
+        )
+    ).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Analysis not found")
-    return analysis
+
+    status, completed_at = version
+    if status != "completed":
+        response.headers["Cache-Control"] = "no-store"
+        return await _load_analysis(db, analysis_id)
+
+    etag = response_cache.analysis_etag(analysis_id, completed_at)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.analysis_cache_max_age_seconds}",
+    }
+    if response_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.completed_analyses.get(analysis_id, etag)
+    if body is None:
+        analysis = await _load_analysis(db, analysis_id)
+        body = AnalysisOut.model_validate(analysis).model_dump_json().encode()
+        response_cache.completed_analyses.put(analysis_id, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _load_analysis(db: AsyncSession, analysis_id: str) -> Analysis:
+    return await db.scalar(
+        select(Analysis).options(*WITH_RESULTS).where(Analysis.id == analysis_id)
+    )
 
 
 @router.get("/analysis/{analysis_id}/status", response_model=StatusOut)
-def get_analysis_status(analysis_id: str, db: Session = Depends(get_db)):
-    analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+async def get_analysis_status(analysis_id: str, db: AsyncSession = Depends(get_async_db)):
+    analysis = await db.get(Analysis, analysis_id)
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     return StatusOut(
@@ -49,17 +165,142 @@ def get_analysis_status(analysis_id: str, db: Session = Depends(get_db)):
     )
 
 
-@router.get("/analyses", response_model=list[AnalysisOut])
-def list_analyses(
-    limit: int = 20,
+@router.get("/analysis/{analysis_id}/events")
+async def stream_analysis_events(
+    analysis_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Server-Sent Events stream of pipeline progress for one analysis.
+
+    Replays everything recorded so far (or everything after Last-Event-ID on
+    reconnect), then pushes new events as the worker records them. The
+    stream ends after a `completed` or `failed` event.
+    """
+    if not await db.get(Analysis, analysis_id):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    try:
+        last_id = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        last_id = 0
+
+    return StreamingResponse(
+        _event_stream(analysis_id, request, last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: dict) -> str:
+    lines = [f"event: {event['type']}", f"data: {json.dumps(event)}"]
+    if event.get("id") is not None:
+        lines.insert(0, f"id: {event['id']}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _analysis_status(analysis_id: str) -> Optional[str]:
+    # Request-scoped sessions are closed before a streaming body runs
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Analysis.status).where(Analysis.id == analysis_id))
+
+
+async def _event_stream(analysis_id: str, request: Request, last_id: int):
+    # Subscribe before replaying so nothing recorded in between is missed
+    queue = events.bus.subscribe(analysis_id)
+    try:
+        for event in await events.history(analysis_id, after_id=last_id):
+            last_id = event["id"]
+            yield _sse(event)
+            if event["type"] in events.TERMINAL_EVENTS:
+                return
+
+        # Finished before progress events existed, or its terminal event was lost
+        status = await _analysis_status(analysis_id)
+        if status in events.TERMINAL_EVENTS:
+            yield _sse({"id": None, "type": status, "stage": None, "data": {}})
+            return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=settings.sse_heartbeat_seconds
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                status = await _analysis_status(analysis_id)
+                if status in events.TERMINAL_EVENTS:
+                    yield _sse({"id": None, "type": status, "stage": None, "data": {}})
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if event["id"] <= last_id:
+                continue
+            last_id = event["id"]
+            yield _sse(event)
+            if event["type"] in events.TERMINAL_EVENTS:
+                return
+    finally:
+        events.bus.unsubscribe(analysis_id, queue)
+
+
+@router.get("/analyses", response_model=list[AnalysisSummaryOut])
+async def list_analyses(
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
     offset: int = 0,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    """Page of analyses, newest first, with per-table result counts.
+
+    Pass the id of the last analysis on a page as `after` to get the next one.
+    That seeks on the (created_at, id) index, so deep pages cost the same as
+    the first; `offset` still works but scans every skipped row.
+    Counts come from one grouped query per result table for the whole page,
+    so the number of queries doesn't grow with `limit`.
+    """
+    query = select(Analysis)
+    if after:
+        if not await db.scalar(select(Analysis.id).where(Analysis.id == after)):
+            raise HTTPException(status_code=400, detail="Unknown 'after' cursor")
+        # Compare against the stored timestamp in SQL rather than a
+        # round-tripped Python value, whose text form differs on SQLite
+        cursor_created_at = (
+            select(Analysis.created_at).where(Analysis.id == after).scalar_subquery()
+        )
+        query = query.where(
+            tuple_(Analysis.created_at, Analysis.id) < tuple_(cursor_created_at, after)
+        )
     analyses = (
-        db.query(Analysis)
-        .order_by(Analysis.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-    return analyses
+        await db.scalars(
+            query.order_by(Analysis.created_at.desc(), Analysis.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+    ).all()
+    ids = [a.id for a in analyses]
+    counts: dict[str, dict[str, int]] = {analysis_id: {} for analysis_id in ids}
+    if ids:
+        for model, field in RESULT_COUNTS.items():
+            rows = await db.execute(
+                select(model.analysis_id, func.count())
+                .where(model.analysis_id.in_(ids))
+                .group_by(model.analysis_id)
+            )
+            for analysis_id, count in rows:
+                counts[analysis_id][field] = count
+
+    return [
+        AnalysisSummaryOut(
+            id=a.id,
+            title=a.title,
+            source_url=a.source_url,
+            status=a.status,
+            stage_status=a.stage_status,
+            summary=a.summary,
+            created_at=a.created_at,
+            completed_at=a.completed_at,
+            **counts[a.id],
+        )
+        for a in analyses
+    ]
@@ -0,0 +1,172 @@
+"""Analysis progress events.
+
+The worker records each step of a pipeline with `emit()`. Events go to the
+analysis_events table because the pipeline and the API run in different
+processes. In the API, one relay task tails that table for every analysis
+that has live subscribers and fans each new event out to the in-process
+subscriber queues that back the SSE streams.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from config import settings
+from models.database import Analysis, AnalysisEvent, AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = {"completed", "failed"}
+
+# Ids are assigned at insert but become visible at commit, so concurrent
+# pipelines can commit slightly out of order; re-scan this many ids back.
+RESCAN_IDS = 100
+
+
+async def emit(analysis_id: str, event: str, stage: Optional[str] = None, **data):
+    """Record a progress event. Never raises: progress is best-effort."""
+    try:
+        async with AsyncSessionLocal() as db:
+            db.add(
+                AnalysisEvent(
+                    analysis_id=analysis_id,
+                    event=event,
+                    stage=stage,
+                    data=json.dumps(data) if data else None,
+                )
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Could not record '{event}' event for {analysis_id}: {e}")
+
+
+def to_dict(row: AnalysisEvent) -> dict:
+    return {
+        "id": row.id,
+        "type": row.event,
+        "stage": row.stage,
+        "data": json.loads(row.data) if row.data else {},
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+async def history(analysis_id: str, after_id: int = 0) -> list[dict]:
+    async with AsyncSessionLocal() as db:
+        rows = await db.scalars(
+            select(AnalysisEvent)
+            .where(AnalysisEvent.analysis_id == analysis_id, AnalysisEvent.id > after_id)
+            .order_by(AnalysisEvent.id)
+        )
+        return [to_dict(row) for row in rows]
+
+
+async def prune(retention_seconds: float) -> int:
+    """Delete the events of finished analyses that have been quiet this long.
+
+    Clients reconnecting after that still get a synthetic terminal event
+    from the analysis status. Returns the number of rows deleted.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    finished = (
+        select(AnalysisEvent.analysis_id)
+        .join(Analysis, Analysis.id == AnalysisEvent.analysis_id)
+        .where(Analysis.status.in_(("completed", "failed")))
+        .group_by(AnalysisEvent.analysis_id)
+        .having(func.max(AnalysisEvent.created_at) < cutoff)
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(AnalysisEvent).where(AnalysisEvent.analysis_id.in_(finished))
+        )
+        await db.commit()
+    if result.rowcount:
+        logger.info(f"Pruned {result.rowcount} progress events of finished analyses")
+    return result.rowcount
+
+
+class EventBus:
+    """In-process fanout of analysis events to any number of subscriber queues."""
+
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._has_subscribers = asyncio.Event()
+        self._delivered: deque[int] = deque(maxlen=RESCAN_IDS * 10)
+        self._delivered_set: set[int] = set()
+        self._last_id = 0
+        self._relay: Optional[asyncio.Task] = None
+
+    def subscribe(self, analysis_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(analysis_id, set()).add(queue)
+        self._has_subscribers.set()
+        return queue
+
+    def unsubscribe(self, analysis_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(analysis_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[analysis_id]
+        if not self._subscribers:
+            self._has_subscribers.clear()
+
+    def publish(self, event: dict, analysis_id: str):
+        for queue in self._subscribers.get(analysis_id, ()):
+            queue.put_nowait(event)
+
+    def _mark_delivered(self, event_id: int) -> bool:
+        if event_id in self._delivered_set:
+            return False
+        if len(self._delivered) == self._delivered.maxlen:
+            self._delivered_set.discard(self._delivered[0])
+        self._delivered.append(event_id)
+        self._delivered_set.add(event_id)
+        return True
+
+    async def start(self):
+        async with AsyncSessionLocal() as db:
+            self._last_id = await db.scalar(select(func.max(AnalysisEvent.id))) or 0
+        self._relay = asyncio.create_task(self._run_relay())
+
+    async def stop(self):
+        if self._relay:
+            self._relay.cancel()
+            await asyncio.gather(self._relay, return_exceptions=True)
+
+    async def _run_relay(self):
+        while True:
+            await self._has_subscribers.wait()
+            try:
+                await self._poll()
+            except Exception as e:
+                logger.warning(f"Event relay poll failed: {e}")
+            await asyncio.sleep(settings.events_poll_interval_seconds)
+
+    async def _poll(self):
+        analysis_ids = list(self._subscribers)
+        if not analysis_ids:
+            return
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.scalars(
+                    select(AnalysisEvent)
+                    .where(
+                        AnalysisEvent.id > self._last_id - RESCAN_IDS,
+                        AnalysisEvent.analysis_id.in_(analysis_ids),
+                    )
+                    .order_by(AnalysisEvent.id)
+                )
+            ).all()
+        for row in rows:
+            if self._mark_delivered(row.id):
+                self.publish(to_dict(row), row.analysis_id)
+            self._last_id = max(self._last_id, row.id)
+
+
+bus = EventBus()
@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime, timedelta
+
+from config import settings
+from models.database import FactCheckCache, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def lookup(fingerprints: list[str]) -> dict[str, dict]:
+    """Unexpired verdicts for claims researched in earlier analyses, keyed by fingerprint."""
+    if not fingerprints:
+        return {}
+    db = SessionLocal()
+    try:
+        query = db.query(FactCheckCache).filter(
+            FactCheckCache.fingerprint.in_(set(fingerprints))
+        )
+        if settings.fact_check_cache_ttl_hours > 0:
+            cutoff = datetime.utcnow() - timedelta(hours=settings.fact_check_cache_ttl_hours)
+            query = query.filter(FactCheckCache.created_at >= cutoff)
+        return {
+            row.fingerprint: {
+                "verdict": row.verdict,
+                "evidence": row.evidence,
+                "sources": row.sources,
+            }
+            for row in query.all()
+        }
+    finally:
+        db.close()
+
+
+def store(results: dict[str, dict]):
+    """Remember completed research so restated claims skip Yutori next time."""
+    if not results:
+        return
+    db = SessionLocal()
+    try:
+        for fingerprint, result in results.items():
+            db.merge(
+                FactCheckCache(
+                    fingerprint=fingerprint,
+                    claim=result["claim"],
+                    verdict=result["verdict"],
+                    evidence=result["evidence"],
+                    sources=result["sources"],
+                    created_at=datetime.utcnow(),
+                )
+            )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to store fact-check verdicts: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -1,9 +1,13 @@
+import asyncio
 import logging
 from typing import Optional
 
 import httpx
 
 from config import settings
+from services import gliner_local, http_clients
+from utils import fallbacks
+from utils.text import sentence_at, sentence_spans, sentence_windows
 
 logger = logging.getLogger(__name__)
 
@@ -22,61 +26,95 @@ FINANCIAL_ENTITY_TYPES = [
     "market_segment",
 ]
 
+ENTITY_SCHEMA = ["person", "company", "product", "date", "percentage", "currency_amount"]
 
-async def _call_pioneer_api(
+CLASSIFICATION_SCHEMA = [
+    "forward_looking_statement",
+    "risk_disclosure",
+    "commitment",
+    "performance_metric",
+    "guidance_update",
+]
+
+
+def _resolve_backend() -> Optional[str]:
+    """Pick "remote" (Pioneer API) or "local" (in-process GLiNER2), or None for mock data."""
+    backend = settings.fastino_backend
+    if backend == "auto":
+        if settings.fastino_api_key:
+            return "remote"
+        return "local" if gliner_local.GLINER2_AVAILABLE else None
+    if backend == "remote" and not settings.fastino_api_key:
+        logger.warning("FASTINO_API_KEY not set, using mock data")
+        return None
+    if backend == "local" and not gliner_local.GLINER2_AVAILABLE:
+        logger.warning("gliner2 is not installed, using mock data")
+        return None
+    return backend
+
+
+async def _extract(
     text: str, schema: list[str], threshold: float = 0.5
 ) -> Optional[list[dict]]:
-    """Call Pioneer GLiNER2 API for entity extraction."""
-    if not settings.fastino_api_key:
-        logger.warning("FASTINO_API_KEY not set, using mock data")
+    """Run GLiNER2 entity extraction over a transcript.
+
+    Long transcripts are split into overlapping sentence windows that are
+    extracted concurrently (bounded by FASTINO_MAX_CONCURRENCY for the remote
+    API; micro-batched for the local engine) and merged back with
+    document-level character offsets.
+    """
+    backend = _resolve_backend()
+    if backend is None:
+        logger.warning("No GLiNER2 backend available, using mock data")
+        return None
+
+    windows = sentence_windows(
+        text,
+        max_chars=settings.fastino_window_chars,
+        overlap_sentences=settings.fastino_window_overlap_sentences,
+    )
+    semaphore = asyncio.Semaphore(settings.fastino_max_concurrency)
+
+    async def _extract_window(window: str) -> Optional[list[dict]]:
+        if backend == "local":
+            return await _call_local_window(window, schema, threshold)
+        async with semaphore:
+            return await _call_pioneer_window(window, schema, threshold)
+
+    results = await asyncio.gather(*(_extract_window(window) for _, window in windows))
+    if windows and all(r is None for r in results):
         return None
 
+    failed = sum(1 for r in results if r is None)
+    if failed:
+        logger.warning(f"GLiNER2 extraction failed for {failed}/{len(windows)} windows")
+    return _merge_windows(
+        text, [(offset, entities or []) for (offset, _), entities in zip(windows, results)]
+    )
+
+
+async def _call_pioneer_window(
+    text: str, schema: list[str], threshold: float
+) -> Optional[list[dict]]:
+    """Single Pioneer request. Entities carry `start`/`end` offsets within `text`."""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                PIONEER_API_URL,
-                headers={
-                    "Content-Type": "application/json",
-                    "X-API-Key": settings.fastino_api_key,
-                },
-                json={
-                    "task": "extract_entities",
-                    "text": text,
-                    "schema": schema,
-                    "threshold": threshold,
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            entities = []
-            result = data.get("result", {})
-            entity_dict = result.get("entities", {})
-
-            for entity_type, entity_list in entity_dict.items():
-                for entity in entity_list:
-                    if isinstance(entity, dict):
-                        entities.append(
-                            {
-                                "name": entity.get("text", ""),
-                                "entity_type": entity_type,
-                                "context": "",
-                                "confidence": entity.get(
-                                    "score", entity.get("confidence", 0.0)
-                                ),
-                            }
-                        )
-                    else:
-                        entities.append(
-                            {
-                                "name": str(entity),
-                                "entity_type": entity_type,
-                                "context": "",
-                                "confidence": 0.9,
-                            }
-                        )
-
-            return entities
+        client = http_clients.get_client("fastino")
+        response = await client.post(
+            PIONEER_API_URL,
+            headers={
+                "Content-Type": "application/json",
+                "X-API-Key": settings.fastino_api_key,
+            },
+            json={
+                "task": "extract_entities",
+                "text": text,
+                "schema": schema,
+                "threshold": threshold,
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        return _parse_entities(data.get("result", {}).get("entities", {}), text)
 
     except httpx.HTTPStatusError as e:
         logger.error(
@@ -88,11 +126,87 @@ async def _call_pioneer_api(
         return None
 
 
-async def extract_entities(text: str) -> list[dict]:
-    """Extract named entities from text using Pioneer GLiNER2 API."""
-    schema = ["person", "company", "product", "date", "percentage", "currency_amount"]
+async def _call_local_window(
+    text: str, schema: list[str], threshold: float
+) -> Optional[list[dict]]:
+    """Single window through the in-process GLiNER2 engine."""
+    try:
+        entity_dict = await gliner_local.get_engine().extract(text, schema, threshold)
+        return _parse_entities(entity_dict, text)
+    except Exception as e:
+        logger.error(f"Local GLiNER2 inference failed: {e}")
+        return None
+
 
-    entities = await _call_pioneer_api(text, schema)
+def _parse_entities(entity_dict: dict, text: str) -> list[dict]:
+    """Normalize GLiNER2's `{label: [...]}` output into entity dicts with spans."""
+    entities = []
+    for entity_type, entity_list in entity_dict.items():
+        search_from: dict[str, int] = {}
+        for entity in entity_list:
+            if isinstance(entity, dict):
+                name = entity.get("text", "")
+                confidence = entity.get("score", entity.get("confidence", 0.0))
+            else:
+                name = str(entity)
+                confidence = 0.9
+
+            start = entity.get("start") if isinstance(entity, dict) else None
+            if start is None:
+                # Locate the span ourselves; repeated mentions advance the cursor.
+                found = text.find(name, search_from.get(name, 0)) if name else -1
+                start = found if found >= 0 else None
+                if start is not None:
+                    search_from[name] = start + len(name)
+
+            entities.append(
+                {
+                    "name": name,
+                    "entity_type": entity_type,
+                    "context": "",
+                    "confidence": confidence,
+                    "start": start,
+                    "end": start + len(name) if start is not None else None,
+                }
+            )
+    return entities
+
+
+def _merge_windows(text: str, window_results: list[tuple[int, list[dict]]]) -> list[dict]:
+    """Map window-local spans to document offsets and collapse duplicates.
+
+    GLiNER2 returns a name once per window it appears in, and overlapping
+    windows see the same mention twice, so entities are kept once per
+    (type, name): the first mention, with its sentence as `context`, at the
+    highest confidence any window gave it.
+    """
+    spans = sentence_spans(text)
+    merged: dict[tuple[str, str], dict] = {}
+
+    for offset, entities in window_results:
+        for entity in entities:
+            if entity["start"] is not None:
+                entity["start"] += offset
+                entity["end"] += offset
+
+            key = (entity["entity_type"], entity["name"].strip().lower())
+            kept = merged.get(key)
+            if kept:
+                kept["confidence"] = max(kept["confidence"], entity["confidence"])
+                if not kept["context"] and entity["start"] is not None:
+                    kept["context"] = sentence_at(text, entity["start"], entity["end"], spans)
+                continue
+
+            if entity["start"] is not None:
+                entity["context"] = sentence_at(text, entity["start"], entity["end"], spans)
+            merged[key] = entity
+
+    return list(merged.values())
+
+
+async def extract_entities(text: str) -> list[dict]:
+    """Extract named entities from text using GLiNER2 (Pioneer API or local)."""
+    entities = await _extract(text, ENTITY_SCHEMA)
     if entities is None:
         return _mock_entity_extraction()
 
@@ -100,34 +214,60 @@ async def extract_entities(text: str) -> list[dict]:
 
 
 async def classify_statements(text: str) -> list[dict]:
-    """Classify statements in the transcript using Pioneer GLiNER2 API."""
-    schema = [
-        "forward_looking_statement",
-        "risk_disclosure",
-        "commitment",
-        "performance_metric",
-        "guidance_update",
-    ]
-
-    results = await _call_pioneer_api(text, schema)
+    """Classify statements in the transcript using GLiNER2 (Pioneer API or local)."""
+    results = await _extract(text, CLASSIFICATION_SCHEMA)
     if results is None:
         return _mock_statement_classification()
 
-    classifications = []
-    for item in results:
-        classifications.append(
-            {
-                "text": item.get("name", ""),
-                "classification": item.get("entity_type", ""),
-                "confidence": item.get("confidence", 0.0),
-            }
-        )
-
+    classifications = _to_classifications(results)
     return classifications if classifications else _mock_statement_classification()
 
 
+async def analyze_transcript(text: str, use_mock: bool = True) -> dict:
+    """Extract entities and classify statements in one GLiNER2 pass.
+
+    Both label sets go into a single request per window and the results are
+    split by label afterwards, halving payload bytes and round-trips compared
+    with calling extract_entities and classify_statements separately.
+    Returns {"entities": [...], "classifications": [...]}; with
+    `use_mock=False`, empty lists stay empty instead of becoming mock data.
+    """
+    results = await _extract(text, ENTITY_SCHEMA + CLASSIFICATION_SCHEMA)
+    if not use_mock:
+        results = results or []
+    elif results is None:
+        return {
+            "entities": _mock_entity_extraction(),
+            "classifications": _mock_statement_classification(),
+        }
+
+    classification_labels = set(CLASSIFICATION_SCHEMA)
+    entities = [r for r in results if r["entity_type"] not in classification_labels]
+    classifications = _to_classifications(
+        [r for r in results if r["entity_type"] in classification_labels]
+    )
+    if not use_mock:
+        return {"entities": entities, "classifications": classifications}
+    return {
+        "entities": entities or _mock_entity_extraction(),
+        "classifications": classifications or _mock_statement_classification(),
+    }
+
+
+def _to_classifications(items: list[dict]) -> list[dict]:
+    return [
+        {
+            "text": item.get("name", ""),
+            "classification": item.get("entity_type", ""),
+            "confidence": item.get("confidence", 0.0),
+        }
+        for item in items
+    ]
+
+
 def _mock_entity_extraction() -> list[dict]:
     """Return mock entity data for development."""
+    fallbacks.record("fastino")
     return [
         {
             "name": "Tim Cook",
@@ -205,6 +345,7 @@ def _mock_entity_extraction() -> list[dict]:
 
 
 def _mock_statement_classification() -> list[dict]:
+    fallbacks.record("fastino")
     return [
         {
             "text": "We expect margin improvement in Q1 as component costs normalize",
@@ -0,0 +1,54 @@
+import logging
+
+from models.database import FrameAnalysisCache, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _key(frame_hash: int) -> str:
+    return f"{frame_hash:016x}"
+
+
+def lookup(frame_hashes: list[int]) -> dict[int, dict]:
+    """Cached Reka analyses for frames seen in earlier calls, keyed by dHash."""
+    if not frame_hashes:
+        return {}
+    by_key = {_key(h): h for h in frame_hashes}
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(FrameAnalysisCache)
+            .filter(FrameAnalysisCache.frame_hash.in_(list(by_key)))
+            .all()
+        )
+        return {
+            by_key[row.frame_hash]: {
+                "description": row.description,
+                "content_type": row.content_type,
+            }
+            for row in rows
+        }
+    finally:
+        db.close()
+
+
+def store(results: dict[int, dict]):
+    """Remember successful frame analyses so repeated slides and logos are free next time."""
+    if not results:
+        return
+    db = SessionLocal()
+    try:
+        for frame_hash, result in results.items():
+            db.merge(
+                FrameAnalysisCache(
+                    frame_hash=_key(frame_hash),
+                    description=result["description"],
+                    content_type=result["content_type"],
+                )
+            )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to store frame analyses: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,118 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+GLINER2_AVAILABLE = importlib.util.find_spec("gliner2") is not None
+
+
+class LocalGlinerEngine:
+    """In-process GLiNER2 inference with a warm model and micro-batching.
+
+    Windows submitted by concurrent analyses are queued; a batcher collects up
+    to `max_batch` of them (waiting at most `max_wait_ms` after the first) and
+    runs them through one `batch_extract_entities` forward pass per label set.
+    Inference runs on a single dedicated thread so the event loop stays free
+    and the model is never entered concurrently.
+    """
+
+    def __init__(self, model_name: str, max_batch: int, max_wait_ms: int):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._model = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gliner2")
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _load(self):
+        if self._model is None:
+            from gliner2 import GLiNER2
+
+            started = time.monotonic()
+            self._model = GLiNER2.from_pretrained(self.model_name)
+            logger.info(
+                f"Loaded GLiNER2 model {self.model_name} in {time.monotonic() - started:.1f}s"
+            )
+        return self._model
+
+    async def warm(self):
+        """Load the model now instead of on the first request."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._load)
+
+    async def extract(self, text: str, labels: list[str], threshold: float) -> dict:
+        """Return GLiNER2's `{label: [{text, confidence, start, end}]}` for one text."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batcher = loop.create_task(self._run_batcher())
+
+        future = loop.create_future()
+        await self._queue.put((text, tuple(labels), threshold, future))
+        return await future
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            groups: dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault((item[1], item[2]), []).append(item)
+
+            for (labels, threshold), items in groups.items():
+                texts = [item[0] for item in items]
+                try:
+                    results = await loop.run_in_executor(
+                        self._executor, self._infer, texts, list(labels), threshold
+                    )
+                except Exception as e:
+                    for item in items:
+                        if not item[3].done():
+                            item[3].set_exception(e)
+                    continue
+                for item, result in zip(items, results):
+                    if not item[3].done():
+                        item[3].set_result(result.get("entities", {}))
+
+    def _infer(self, texts: list[str], labels: list[str], threshold: float) -> list[dict]:
+        return self._load().batch_extract_entities(
+            texts,
+            labels,
+            batch_size=len(texts),
+            threshold=threshold,
+            include_confidence=True,
+            include_spans=True,
+        )
+
+
+_engine: Optional[LocalGlinerEngine] = None
+
+
+def get_engine() -> LocalGlinerEngine:
+    """Process-wide engine; the model is loaded once per worker process."""
+    global _engine
+    if _engine is None:
+        _engine = LocalGlinerEngine(
+            settings.gliner_model,
+            max_batch=settings.gliner_batch_size,
+            max_wait_ms=settings.gliner_batch_wait_ms,
+        )
+    return _engine
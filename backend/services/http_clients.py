@@ -0,0 +1,72 @@
+import asyncio
+import importlib.util
+import logging
+import weakref
+from dataclasses import dataclass
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    timeout: float
+    connect_timeout: float = 10.0
+    http2: bool = True
+
+
+# One pooled client per upstream host so connection limits are per host.
+PROVIDERS = {
+    "reka": ProviderConfig(timeout=60.0),  # api.reka.ai chat
+    "reka_vision": ProviderConfig(timeout=300.0),  # vision-agent.api.reka.ai uploads
+    "modulate": ProviderConfig(timeout=120.0, http2=False),  # large multipart uploads
+    "fastino": ProviderConfig(timeout=120.0),
+    "yutori": ProviderConfig(timeout=180.0),
+}
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Clients are bound to the event loop that opened their connections, so the
+# registry is keyed by loop as well as provider.
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    config = PROVIDERS[provider]
+    return httpx.AsyncClient(
+        http2=config.http2 and _HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections_per_host,
+            max_keepalive_connections=settings.http_max_keepalive_per_host,
+            keepalive_expiry=settings.http_keepalive_expiry_seconds,
+        ),
+    )
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """Return the process-wide pooled client for a provider, creating it on first use."""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(provider)
+    if client is None or client.is_closed:
+        client = clients[provider] = _build_client(provider)
+    return client
+
+
+async def init_clients():
+    """Create every provider client up front (app/worker startup)."""
+    for provider in PROVIDERS:
+        get_client(provider)
+    logger.info(
+        f"HTTP clients ready for {', '.join(PROVIDERS)} (http2={_HTTP2_AVAILABLE})"
+    )
+
+
+async def close_clients():
+    """Close the clients owned by the running event loop."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
@@ -0,0 +1,129 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models.database import Analysis, Job
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(
+    db: Session,
+    analysis_id: str,
+    source_url: str,
+    force_refresh: bool = False,
+    live: bool = False,
+) -> Job:
+    """Add a pipeline job for an analysis. The caller owns the commit."""
+    job = Job(
+        analysis_id=analysis_id,
+        source_url=source_url,
+        force_refresh=force_refresh,
+        live=live,
+        status="queued",
+        attempts=0,
+    )
+    db.add(job)
+    return job
+
+
+def claim_next(db: Session, worker_id: str) -> Optional[dict]:
+    """Atomically move the oldest queued job to running and return it.
+
+    Uses a conditional UPDATE rather than row locks so the same code works on
+    SQLite and PostgreSQL: if another worker wins the race, the update matches
+    zero rows and we try the next candidate.
+    """
+    candidates = (
+        db.query(Job.id)
+        .filter(Job.status == "queued")
+        .order_by(Job.created_at)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = (
+            db.query(Job)
+            .filter(Job.id == job_id, Job.status == "queued")
+            .update(
+                {
+                    Job.status: "running",
+                    Job.worker_id: worker_id,
+                    Job.locked_at: datetime.utcnow(),
+                    Job.attempts: Job.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed:
+            job = db.get(Job, job_id)
+            return {
+                "id": job.id,
+                "analysis_id": job.analysis_id,
+                "source_url": job.source_url,
+                "force_refresh": bool(job.force_refresh),
+                "live": bool(job.live),
+                "attempts": job.attempts,
+            }
+    return None
+
+
+def heartbeat(db: Session, job_ids: list[str]):
+    """Extend the lease on jobs this worker is still running."""
+    if not job_ids:
+        return
+    db.query(Job).filter(Job.id.in_(job_ids), Job.status == "running").update(
+        {Job.locked_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def complete(db: Session, job_id: str):
+    db.query(Job).filter(Job.id == job_id).update(
+        {Job.status: "completed", Job.finished_at: datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def fail(db: Session, job_id: str, error: str):
+    db.query(Job).filter(Job.id == job_id).update(
+        {Job.status: "failed", Job.error: error, Job.finished_at: datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def requeue_stale(db: Session, lease_seconds: int, max_attempts: int) -> int:
+    """Recover jobs whose worker died mid-run (lease expired without heartbeat).
+
+    Jobs with attempts left go back to the queue; the rest are failed along
+    with their analysis so the dashboard stops showing them as processing.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    stale = (
+        db.query(Job)
+        .filter(Job.status == "running", Job.locked_at < cutoff)
+        .all()
+    )
+    for job in stale:
+        if job.attempts < max_attempts:
+            logger.warning(f"Requeueing stale job {job.id} (attempt {job.attempts})")
+            job.status = "queued"
+            job.worker_id = None
+            job.locked_at = None
+        else:
+            logger.error(f"Job {job.id} exceeded {max_attempts} attempts, failing")
+            job.status = "failed"
+            job.error = "Worker lease expired too many times"
+            job.finished_at = datetime.utcnow()
+            analysis = db.get(Analysis, job.analysis_id)
+            if analysis and analysis.status == "processing":
+                analysis.status = "failed"
+                analysis.summary = "Analysis failed: worker lease expired"
+    if stale:
+        db.commit()
+    return len(stale)
@@ -1,62 +1,68 @@
 import logging
 from typing import Optional
 
-import httpx
-
 from config import settings
+from services import http_clients
+from utils import fallbacks
 
 logger = logging.getLogger(__name__)
 
 MODULATE_API_URL = "https://modulate-developer-apis.com/api/velma-2-stt-batch"
 
 
-async def analyze_voice(audio_path: Optional[str] = None, transcript: Optional[str] = None) -> list[dict]:
+async def analyze_voice(
+    audio_path: Optional[str] = None,
+    transcript: Optional[str] = None,
+    use_mock: bool = True,
+) -> list[dict]:
     """Analyze voice patterns using Modulate Velma-2 API.
 
     Analyzes audio for speaker diarization, emotion detection,
-    and accent identification.
+    and accent identification. With `use_mock=False`, returns [] instead of
+    mock data when there is no API key, no audio or no result.
     """
+    fallback = _mock_voice_analysis if use_mock else list
     if not settings.modulate_api_key:
         logger.warning("MODULATE_API_KEY not set, using mock data")
-        return _mock_voice_analysis()
+        return fallback()
 
     if not audio_path:
         logger.warning("No audio path provided, using mock data")
-        return _mock_voice_analysis()
+        return fallback()
 
     try:
-        async with httpx.AsyncClient(timeout=120) as client:
-            with open(audio_path, "rb") as audio_file:
-                response = await client.post(
-                    MODULATE_API_URL,
-                    headers={"X-API-Key": settings.modulate_api_key},
-                    files={"upload_file": audio_file},
-                    data={
-                        "speaker_diarization": "true",
-                        "emotion_signal": "true",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-
-            segments = []
-            for utterance in data.get("utterances", []):
-                segments.append({
-                    "start_time": utterance.get("start_ms", 0) / 1000.0,
-                    "end_time": (utterance.get("start_ms", 0) + utterance.get("duration_ms", 0)) / 1000.0,
-                    "speaker": f"Speaker {utterance.get('speaker', 'Unknown')}",
-                    "confidence_score": _emotion_to_confidence(utterance.get("emotion", "Neutral")),
-                    "tone": utterance.get("emotion", "neutral").lower(),
-                    "transcript": utterance.get("text", ""),
-                    "accent": utterance.get("accent"),
-                    "language": utterance.get("language"),
-                })
-
-            return segments if segments else _mock_voice_analysis()
+        client = http_clients.get_client("modulate")
+        with open(audio_path, "rb") as audio_file:
+            response = await client.post(
+                MODULATE_API_URL,
+                headers={"X-API-Key": settings.modulate_api_key},
+                files={"upload_file": audio_file},
+                data={
+                    "speaker_diarization": "true",
+                    "emotion_signal": "true",
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+
+        segments = []
+        for utterance in data.get("utterances", []):
+            segments.append({
+                "start_time": utterance.get("start_ms", 0) / 1000.0,
+                "end_time": (utterance.get("start_ms", 0) + utterance.get("duration_ms", 0)) / 1000.0,
+                "speaker": f"Speaker {utterance.get('speaker', 'Unknown')}",
+                "confidence_score": _emotion_to_confidence(utterance.get("emotion", "Neutral")),
+                "tone": utterance.get("emotion", "neutral").lower(),
+                "transcript": utterance.get("text", ""),
+                "accent": utterance.get("accent"),
+                "language": utterance.get("language"),
+            })
+
+        return segments if segments else fallback()
 
     except Exception as e:
         logger.error(f"Modulate analysis failed: {e}")
-        return _mock_voice_analysis()
+        return fallback()
 
 
 def _emotion_to_confidence(emotion: str) -> float:
@@ -76,6 +82,7 @@ def _emotion_to_confidence(emotion: str) -> float:
 
 def _mock_voice_analysis() -> list[dict]:
     """Return mock voice analysis data for development."""
+    fallbacks.record("modulate")
     segments = [
         {
             "start_time": 0.0,
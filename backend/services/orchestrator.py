@@ -1,207 +1,506 @@
 import asyncio
 import logging
-from datetime import datetime
+import tempfile
+import time
+from collections import Counter
+from contextlib import aclosing
+from typing import Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from models.database import (
-    Analysis,
-    Entity,
-    FactCheck,
-    SessionLocal,
-    VisualSegment,
-    VoiceSegment,
+from config import settings
+from models.database import Analysis, AsyncSessionLocal
+from services import (
+    events,
+    fastino_service,
+    modulate_service,
+    persistence,
+    reka_service,
+    result_cache,
+    transcription,
+    yutori_service,
 )
-from services import fastino_service, modulate_service, reka_service, yutori_service
-from utils.media import cleanup_work_dir, download_media, extract_frames
+from utils import fallbacks
+from utils.media import (
+    FrameSampling,
+    MediaTimeouts,
+    StreamWindow,
+    cleanup_window,
+    cleanup_work_dir,
+    decode_window,
+    download_media,
+    probe_media,
+    stream_windows,
+)
+from utils.stage_graph import StageGraph
 
 logger = logging.getLogger(__name__)
 
 
-def _unwrap(result, service_name: str, fallback: list) -> list:
-    """Return result if successful, otherwise log the error and return fallback mock data."""
-    if isinstance(result, Exception):
-        logger.error(f"{service_name} failed, falling back to mock data: {result}")
-        return fallback
-    return result
-
+async def run_analysis_pipeline(
+    analysis_id: str, source_url: str, force_refresh: bool = False
+):
+    """Main orchestrator — runs all analysis services and stores results.
 
-def run_analysis_pipeline(analysis_id: str, source_url: str):
-    """Main orchestrator — runs all analysis services and stores results."""
-    asyncio.run(_async_pipeline(analysis_id, source_url))
+    Called by the worker on its long-lived event loop; never from the API process.
+    Marks the analysis failed and re-raises if any step fails.
+    """
+    with fallbacks.tracking():
+        await _async_pipeline(analysis_id, source_url, force_refresh)
 
 
-async def _async_pipeline(analysis_id: str, source_url: str):
-    db = SessionLocal()
-    work_dir = None
+async def _async_pipeline(analysis_id: str, source_url: str, force_refresh: bool = False):
+    db = AsyncSessionLocal()
+    media: dict = {}
     try:
-        analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
+        analysis = await db.get(Analysis, analysis_id)
         if not analysis:
             logger.error(f"Analysis {analysis_id} not found")
             return
 
         logger.info(f"Starting analysis pipeline for {analysis_id}")
+        await events.emit(analysis_id, "started")
+        # A retried job starts clean rather than on top of a partial attempt
+        await persistence.reset_stages(db, analysis)
 
-        # Step 1: Download media
-        media = download_media(source_url)
-        work_dir = media.get("work_dir")
+        # Step 1: Resolve the video id and reuse a recent analysis of it
+        try:
+            info: Optional[dict] = await probe_media(source_url)
+        except Exception as e:
+            logger.warning(f"Could not resolve media metadata: {e}")
+            info = None
+        source_keys = [
+            analysis.source_key or result_cache.normalize_url(source_url),
+            result_cache.source_key_from_info(info),
+        ]
+        if not force_refresh and await _reuse_cached(db, analysis, source_keys=source_keys):
+            await events.emit(analysis_id, "completed", cached=True)
+            return
 
+        # Step 2: Download and decode media, then check for identical content
+        # submitted under a different URL
+        if info:
+            media = await download_media(
+                source_url, sampling=_frame_sampling(), info=info, timeouts=_media_timeouts()
+            )
+        else:
+            media = {"error": "Media metadata unavailable"}
         if media.get("error"):
             logger.warning(
                 f"Media download failed: {media['error']}. Proceeding with mock data."
             )
-
-        video_path = media.get("video_path")
-        audio_path = media.get("audio_path")
-
-        # Step 2: Extract frames for visual analysis
-        frames = []
-        if video_path:
-            frames = extract_frames(video_path, interval_seconds=30)
-
-        # Step 3: Build a mock transcript (in production, use Whisper or similar)
-        transcript = _get_transcript_text()
-
-        # Step 4: Run all analysis services in parallel — each is independent.
-        # return_exceptions=True ensures one failing service never kills the others.
-        if video_path:
-            visual_task = reka_service.analyze_video_vision_api(video_path)
+            fallbacks.record("media")
+            await events.emit(analysis_id, "media_failed", error=media["error"])
         else:
-            visual_task = (
-                reka_service.analyze_video_frames(frames)
-                if frames
-                else reka_service.analyze_video_url(source_url)
+            await events.emit(
+                analysis_id, "media_downloaded", frames=len(media.get("frames") or [])
+            )
+            if media.get("video_path"):
+                analysis.media_hash = await asyncio.to_thread(
+                    result_cache.hash_file, media["video_path"]
+                )
+                # Kept beside the URL key so create_analysis still matches resubmissions
+                analysis.source_key = source_keys[0]
+                analysis.extractor_key = source_keys[1]
+                await db.commit()
+                if not force_refresh and await _reuse_cached(
+                    db, analysis, media_hash=analysis.media_hash
+                ):
+                    await events.emit(analysis_id, "completed", cached=True)
+                    return
+
+        # Steps 3-6: run every stage as soon as its inputs exist. The critical
+        # path decides wall-clock time, not the slowest provider in a batch.
+        # Stages with result rows are stored as they finish, so the API can
+        # serve entities and voice while fact-checking is still running.
+        store_lock = asyncio.Lock()
+
+        async def _stage_done(name: str, value, seconds: float):
+            if name in persistence.STAGE_ROWS:
+                # The stage hooks run concurrently but share one session
+                async with store_lock:
+                    try:
+                        await persistence.store_stage(db, analysis, name, value)
+                    except Exception as e:
+                        # store_results() writes it with the rest at the end
+                        logger.warning(f"Could not store '{name}' results early: {e}")
+            count = len(value) if isinstance(value, list) else None
+            await events.emit(
+                analysis_id, "stage_completed", stage=name, seconds=round(seconds, 2), count=count
             )
-        voice_task = modulate_service.analyze_voice(audio_path, transcript)
-        entity_task = fastino_service.extract_entities(transcript)
-        classification_task = fastino_service.classify_statements(transcript)
-
-        raw_results = await asyncio.gather(
-            visual_task,
-            voice_task,
-            entity_task,
-            classification_task,
-            return_exceptions=True,
-        )
 
-        visual_results = _unwrap(
-            raw_results[0], "Reka Vision", reka_service._mock_visual_analysis(5)
-        )
-        voice_results = _unwrap(
-            raw_results[1], "Modulate", modulate_service._mock_voice_analysis()
-        )
-        entities = _unwrap(
-            raw_results[2],
-            "Fastino entities",
-            fastino_service._mock_entity_extraction(),
-        )
-        classifications = _unwrap(
-            raw_results[3],
-            "Fastino classify",
-            fastino_service._mock_statement_classification(),
+        results = await _build_stage_graph(analysis_id, source_url, media).run(
+            on_stage_done=_stage_done
         )
 
-        # Step 5: Fact-check key claims using Yutori (also resilient)
-        claims_to_check = [
-            c
-            for c in classifications
-            if c.get("classification")
-            in ("forward_looking_statement", "performance_metric", "risk_disclosure")
-        ]
-        try:
-            fact_check_results = await yutori_service.fact_check_claims(claims_to_check)
-        except Exception as e:
-            logger.error(f"Yutori fact-checking failed, using mock: {e}")
-            fact_check_results = yutori_service._mock_fact_checks()
-
-        # Step 6: Store all results in database
-        _store_visual_segments(db, analysis_id, visual_results)
-        _store_voice_segments(db, analysis_id, voice_results)
-        _store_entities(db, analysis_id, entities)
-        _store_fact_checks(db, analysis_id, fact_check_results)
-
         # Step 7: Generate summary
         summary = _generate_summary(
-            entities, voice_results, visual_results, fact_check_results
+            results["entities"], results["voice"], results["visual"], results["fact_checks"]
         )
-        analysis.summary = summary
-        analysis.status = "completed"
-        analysis.completed_at = datetime.utcnow()
-        db.commit()
+
+        # Step 8: Store any stage whose incremental write failed and mark completed
+        mocked = fallbacks.used()
+        if mocked:
+            logger.warning(f"{analysis_id} used mock data for: {', '.join(sorted(mocked))}")
+        analysis.used_mock_data = bool(mocked)
+        await persistence.store_results(db, analysis, results, summary)
 
         logger.info(f"Analysis pipeline completed for {analysis_id}")
+        await events.emit(analysis_id, "completed")
 
     except Exception as e:
         logger.error(f"Analysis pipeline failed for {analysis_id}: {e}")
-        try:
-            analysis = db.query(Analysis).filter(Analysis.id == analysis_id).first()
-            if analysis:
-                analysis.status = "failed"
-                analysis.summary = f"Analysis failed: {str(e)}"
-                db.commit()
-        except Exception as db_err:
-            logger.error(f"Failed to update analysis status: {db_err}")
+        await _mark_failed(db, analysis_id, e)
+        # The worker marks the job failed too, so both statuses agree
+        raise
     finally:
-        if work_dir:
-            cleanup_work_dir(work_dir)
-        db.close()
-
-
-def _store_visual_segments(db: Session, analysis_id: str, segments: list[dict]):
-    for seg in segments:
-        db.add(
-            VisualSegment(
-                analysis_id=analysis_id,
-                timestamp=seg.get("timestamp", 0),
-                description=seg.get("description", ""),
-                content_type=seg.get("content_type", "unknown"),
-            )
-        )
-    db.commit()
-
-
-def _store_voice_segments(db: Session, analysis_id: str, segments: list[dict]):
-    for seg in segments:
-        db.add(
-            VoiceSegment(
-                analysis_id=analysis_id,
-                start_time=seg.get("start_time", 0),
-                end_time=seg.get("end_time", 0),
-                speaker=seg.get("speaker", "Unknown"),
-                confidence_score=seg.get("confidence_score", 0),
-                tone=seg.get("tone", "neutral"),
-                transcript=seg.get("transcript", ""),
+        if media.get("work_dir"):
+            cleanup_work_dir(media["work_dir"])
+        await db.close()
+
+
+async def run_live_analysis_pipeline(analysis_id: str, source_url: str):
+    """Live mode — analyze an HLS/RTMP/file stream while it is still running.
+
+    The stream is cut into rolling windows; each window's voice, frame and
+    entity results are appended to the analysis as soon as that window is
+    analyzed, and its claims are fact-checked in the background. The
+    analysis completes when the stream ends (see utils.media.stream_windows).
+    """
+    db = AsyncSessionLocal()
+    work_dir = tempfile.mkdtemp(prefix="echomind_live_")
+    store_lock = asyncio.Lock()
+    fact_check_tasks: set[asyncio.Task] = set()
+    results: dict[str, list[dict]] = {stage: [] for stage in persistence.STAGE_ROWS}
+    seen_entities: set[tuple[str, str]] = set()
+    try:
+        analysis = await db.get(Analysis, analysis_id)
+        if not analysis:
+            logger.error(f"Analysis {analysis_id} not found")
+            return
+
+        logger.info(f"Starting live analysis of {source_url} for {analysis_id}")
+        await events.emit(analysis_id, "started", live=True)
+        await persistence.reset_stages(db, analysis)
+        sampling = _frame_sampling()
+
+        async def _append(window_results: dict[str, list[dict]]):
+            for stage, rows in window_results.items():
+                results[stage].extend(rows)
+            summary = _generate_summary(
+                results["entities"], results["voice"], results["visual"], results["fact_checks"]
             )
+            # Window analysis and background fact-checks share one session
+            async with store_lock:
+                await persistence.append_results(db, analysis, window_results, summary)
+
+        async def _fact_check(claims: list[dict], company: Optional[str]):
+            try:
+                checked = await yutori_service.fact_check_claims(
+                    claims, company=company, use_mock=False
+                )
+                if checked:
+                    await _append({"fact_checks": checked})
+            except Exception as e:
+                logger.error(f"Live fact-check failed for {analysis_id}: {e}")
+
+        # aclosing() stops ffmpeg even if the loop below raises
+        windows = stream_windows(
+            source_url,
+            work_dir,
+            window_seconds=settings.live_window_seconds,
+            idle_timeout=max(settings.live_idle_timeout_seconds, 2 * settings.live_window_seconds),
+            max_duration=settings.live_max_duration_seconds,
         )
-    db.commit()
-
-
-def _store_entities(db: Session, analysis_id: str, entities: list[dict]):
-    for ent in entities:
-        db.add(
-            Entity(
-                analysis_id=analysis_id,
-                name=ent.get("name", ""),
-                entity_type=ent.get("entity_type", "unknown"),
-                context=ent.get("context", ""),
-                confidence=ent.get("confidence", 0),
-            )
+        async with aclosing(windows):
+            async for window in windows:
+                started = time.monotonic()
+                try:
+                    window_results, claims = await _analyze_window(window, sampling)
+                except Exception as e:
+                    logger.error(f"Live window {window.index} of {analysis_id} failed: {e}")
+                    await events.emit(
+                        analysis_id, "window_failed", index=window.index, error=str(e)
+                    )
+                    continue
+                finally:
+                    cleanup_window(window)
+
+                # Windows overlap in who and what gets mentioned; keep first mentions
+                entities = []
+                for entity in window_results["entities"]:
+                    key = (entity.get("name", "").strip().lower(), entity.get("entity_type"))
+                    if key not in seen_entities:
+                        seen_entities.add(key)
+                        entities.append(entity)
+                window_results["entities"] = entities
+                if any(window_results.values()):
+                    await _append(window_results)
+
+                if claims:
+                    task = asyncio.create_task(
+                        _fact_check(claims, _primary_company(results["entities"]))
+                    )
+                    fact_check_tasks.add(task)
+                    task.add_done_callback(fact_check_tasks.discard)
+
+                await events.emit(
+                    analysis_id,
+                    "window_completed",
+                    index=window.index,
+                    start=window.start,
+                    end=window.end,
+                    seconds=round(time.monotonic() - started, 2),
+                    voice=len(window_results["voice"]),
+                    low_confidence=sum(
+                        1
+                        for seg in window_results["voice"]
+                        if seg.get("confidence_score", 1) < 0.7
+                    ),
+                    entities=len(entities),
+                    claims=len(claims),
+                )
+
+        if fact_check_tasks:
+            await asyncio.gather(*fact_check_tasks)
+        summary = _generate_summary(
+            results["entities"], results["voice"], results["visual"], results["fact_checks"]
         )
-    db.commit()
-
-
-def _store_fact_checks(db: Session, analysis_id: str, fact_checks: list[dict]):
-    for fc in fact_checks:
-        db.add(
-            FactCheck(
-                analysis_id=analysis_id,
-                claim=fc.get("claim", ""),
-                verdict=fc.get("verdict", "unverified"),
-                evidence=fc.get("evidence", ""),
-                sources=fc.get("sources", "[]"),
+        # Every window is already stored; this only marks the stages completed
+        await persistence.store_results(db, analysis, {}, summary)
+
+        logger.info(f"Live analysis completed for {analysis_id}")
+        await events.emit(analysis_id, "completed")
+
+    except Exception as e:
+        logger.error(f"Live analysis failed for {analysis_id}: {e}")
+        await _mark_failed(db, analysis_id, e)
+        # The worker marks the job failed too, so both statuses agree
+        raise
+    finally:
+        for task in fact_check_tasks:
+            task.cancel()
+        cleanup_work_dir(work_dir)
+        await db.close()
+
+
+async def _analyze_window(
+    window: StreamWindow, sampling: FrameSampling
+) -> tuple[dict[str, list[dict]], list[dict]]:
+    """Voice, frame and entity analysis of one live window.
+
+    Returns the window's results by stage, with times shifted to positions in
+    the whole stream, and the claims in it worth fact-checking. Providers
+    never substitute mock data here: a silent or failed window adds nothing.
+    """
+    decoded = await decode_window(window, sampling, _media_timeouts())
+
+    async def voice():
+        segments = await modulate_service.analyze_voice(decoded["audio_path"], use_mock=False)
+        return [
+            {
+                **seg,
+                "start_time": seg.get("start_time", 0) + window.start,
+                "end_time": seg.get("end_time", 0) + window.start,
+            }
+            for seg in segments
+        ]
+
+    async def visual():
+        if not decoded["frames"]:
+            return []
+        return await reka_service.analyze_video_frames(decoded["frames"], use_mock=False)
+
+    voice_segments, visual_segments = await asyncio.gather(voice(), visual())
+    transcript = _transcript_from_voice(voice_segments)
+    if transcript:
+        extracted = await fastino_service.analyze_transcript(transcript, use_mock=False)
+    else:
+        extracted = {"entities": [], "classifications": []}
+    return (
+        {"voice": voice_segments, "visual": visual_segments, "entities": extracted["entities"]},
+        _checkable_claims(extracted["classifications"]),
+    )
+
+
+async def _mark_failed(db: AsyncSession, analysis_id: str, error: Exception):
+    try:
+        await db.rollback()
+        analysis = await db.get(Analysis, analysis_id)
+        if analysis:
+            analysis.status = "failed"
+            analysis.summary = f"Analysis failed: {str(error)}"
+            await db.commit()
+        await events.emit(analysis_id, "failed", error=str(error))
+    except Exception as db_err:
+        logger.error(f"Failed to update analysis status: {db_err}")
+
+
+def _frame_sampling() -> FrameSampling:
+    return FrameSampling(
+        mode=settings.frame_sampling_mode,
+        interval_seconds=settings.frame_interval_seconds,
+        scene_threshold=settings.frame_scene_threshold,
+        min_spacing=settings.frame_min_spacing_seconds,
+        max_spacing=settings.frame_max_spacing_seconds,
+        max_frames=settings.frame_budget,
+    )
+
+
+def _media_timeouts() -> MediaTimeouts:
+    return MediaTimeouts(
+        download=settings.media_download_timeout_seconds,
+        decode=settings.media_decode_timeout_seconds,
+        per_minute=settings.media_timeout_per_minute_seconds,
+    )
+
+
+async def _reuse_cached(db: AsyncSession, analysis: Analysis, **keys) -> bool:
+    """Clone a recent completed analysis with matching keys into this one."""
+
+    def _clone(sync_db: Session) -> bool:
+        cached = result_cache.find_cached(sync_db, exclude_id=analysis.id, **keys)
+        if not cached:
+            return False
+        result_cache.clone_analysis(sync_db, cached, analysis)
+        return True
+
+    if not await db.run_sync(_clone):
+        return False
+    await db.commit()
+    return True
+
+
+def _build_stage_graph(analysis_id: str, source_url: str, media: dict) -> StageGraph:
+    """Declare the pipeline as a DAG of stages and their inputs.
+
+    visual
+    utterances ──┬─ voice
+                 └┄ transcript ── fastino ──┬─ entities ────────────┐
+                                            │                       │
+                                            └─ classifications ── fact_checks
+
+    The transcript comes from the Velma-2 utterances when Modulate is the
+    transcription backend, so the call is uploaded once; otherwise it is
+    transcribed from the audio in parallel with everything else.
+    """
+    graph = StageGraph()
+    transcribe_from_voice = transcription._resolve_backend() == "modulate"
+
+    async def visual_stage():
+        if media.get("frames") and (
+            settings.reka_visual_source == "frames" or not media.get("video_path")
+        ):
+            return await reka_service.analyze_video_frames(media["frames"])
+        if media.get("video_path"):
+            return await reka_service.analyze_video_vision_api(media["video_path"])
+        return await reka_service.analyze_video_url(source_url)
+
+    async def utterances_stage():
+        # Only what Velma-2 heard; mock voice data must never become a transcript
+        return await modulate_service.analyze_voice(media.get("audio_path"), use_mock=False)
+
+    async def voice_stage(utterances):
+        return utterances or modulate_service._mock_voice_analysis()
+
+    async def transcript_stage(utterances=None):
+        if transcribe_from_voice:
+            return transcription.from_voice(utterances or [])
+        return await transcription.transcribe(media.get("audio_path"))
+
+    async def fastino_stage(transcript):
+        text = transcription.transcript_text(transcript)
+        if not text.strip():
+            logger.warning(f"No transcript for {analysis_id}, skipping entity extraction")
+            return {"entities": [], "classifications": []}
+        return await fastino_service.analyze_transcript(text)
+
+    async def entities_stage(fastino):
+        return fastino["entities"]
+
+    async def classifications_stage(fastino):
+        return fastino["classifications"]
+
+    async def fact_checks_stage(classifications, entities):
+        claims_to_check = _checkable_claims(classifications)
+        if not claims_to_check:
+            return []
+
+        async def _progress(done: int, total: int):
+            await events.emit(
+                analysis_id, "fact_check_progress", stage="fact_checks", done=done, total=total
             )
+
+        return await yutori_service.fact_check_claims(
+            claims_to_check, company=_primary_company(entities), on_progress=_progress
         )
-    db.commit()
+
+    graph.add(
+        "visual",
+        visual_stage,
+        fallback=lambda: reka_service._mock_visual_analysis(5),
+    )
+    graph.add("utterances", utterances_stage, fallback=list)
+    graph.add(
+        "voice",
+        voice_stage,
+        deps=("utterances",),
+        fallback=modulate_service._mock_voice_analysis,
+    )
+    graph.add(
+        "transcript",
+        transcript_stage,
+        deps=("utterances",) if transcribe_from_voice else (),
+        fallback=list,
+    )
+    graph.add(
+        "fastino",
+        fastino_stage,
+        deps=("transcript",),
+        fallback=lambda: {
+            "entities": fastino_service._mock_entity_extraction(),
+            "classifications": fastino_service._mock_statement_classification(),
+        },
+    )
+    graph.add(
+        "entities",
+        entities_stage,
+        deps=("fastino",),
+        fallback=fastino_service._mock_entity_extraction,
+    )
+    graph.add(
+        "classifications",
+        classifications_stage,
+        deps=("fastino",),
+        fallback=fastino_service._mock_statement_classification,
+    )
+    graph.add(
+        "fact_checks",
+        fact_checks_stage,
+        deps=("classifications", "entities"),
+        fallback=yutori_service._mock_fact_checks,
+    )
+    return graph
+
+
+def _checkable_claims(classifications: list[dict]) -> list[dict]:
+    return [
+        c
+        for c in classifications
+        if c.get("classification")
+        in ("forward_looking_statement", "performance_metric", "risk_disclosure")
+    ]
+
+
+def _primary_company(entities: list[dict]) -> Optional[str]:
+    """The company the call is about: the one mentioned most often."""
+    counts = Counter(
+        e["name"].strip()
+        for e in entities
+        if e.get("entity_type") == "company" and e.get("name")
+    )
+    return counts.most_common(1)[0][0] if counts else None
 
 
 def _generate_summary(entities, voice, visual, fact_checks) -> str:
@@ -260,21 +559,7 @@ def _generate_summary(entities, voice, visual, fact_checks) -> str:
     return "\n".join(summary_parts)
 
 
-def _get_transcript_text() -> str:
-    """Placeholder transcript for demo purposes."""
-    return (
-        "Good afternoon everyone. Thank you for joining us for our Q4 2024 earnings call. "
-        "I'm Tim Cook, CEO of Apple. Joining me today is Luca Maestri, our CFO. "
-        "We're thrilled to report another record quarter. Total revenue for the quarter "
-        "reached $110.2 billion, up 23% year over year. Our Services business continues "
-        "to accelerate, and we now have over 1 billion paid subscriptions across our platform. "
-        "iPhone revenue came in at $65.8 billion, with strong demand across the lineup. "
-        "Our product pipeline has never been stronger. We're seeing incredible adoption "
-        "of our AI features across the ecosystem. "
-        "Gross margins came in at 46.2%, slightly below expectations due to component costs, "
-        "but we expect improvement in Q1 as supply chain conditions normalize. "
-        "We continue to invest aggressively in R&D, with $7.4 billion this quarter alone. "
-        "Greater China revenue grew 11% to $21.4 billion, showing strong recovery. "
-        "We returned $25 billion to shareholders through dividends and buybacks this quarter. "
-        "Looking ahead, we see continued momentum across all product categories."
-    )
+def _transcript_from_voice(voice: list[dict]) -> str:
+    """Join Modulate's per-utterance text into a single transcript."""
+    return " ".join(seg["transcript"] for seg in voice if seg.get("transcript"))
+
@@ -0,0 +1,181 @@
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import Analysis, Entity, FactCheck, VisualSegment, VoiceSegment
+from services import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+def visual_rows(analysis_id: str, segments: list[dict]) -> list[dict]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "timestamp": seg.get("timestamp", 0),
+            "description": seg.get("description", ""),
+            "content_type": seg.get("content_type", "unknown"),
+        }
+        for seg in segments
+    ]
+
+
+def voice_rows(analysis_id: str, segments: list[dict]) -> list[dict]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "start_time": seg.get("start_time", 0),
+            "end_time": seg.get("end_time", 0),
+            "speaker": seg.get("speaker", "Unknown"),
+            "confidence_score": seg.get("confidence_score", 0),
+            "tone": seg.get("tone", "neutral"),
+            "transcript": seg.get("transcript", ""),
+        }
+        for seg in segments
+    ]
+
+
+def entity_rows(analysis_id: str, entities: list[dict]) -> list[dict]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "name": ent.get("name", ""),
+            "entity_type": ent.get("entity_type", "unknown"),
+            "context": ent.get("context", ""),
+            "confidence": ent.get("confidence", 0),
+        }
+        for ent in entities
+    ]
+
+
+def fact_check_rows(analysis_id: str, fact_checks: list[dict]) -> list[dict]:
+    return [
+        {
+            "analysis_id": analysis_id,
+            "claim": fc.get("claim", ""),
+            "verdict": fc.get("verdict", "unverified"),
+            "evidence": fc.get("evidence", ""),
+            "sources": fc.get("sources", "[]"),
+        }
+        for fc in fact_checks
+    ]
+
+
+# Pipeline stage -> (result table, row builder). Each is written as soon as
+# its stage finishes so partial results are readable mid-pipeline.
+STAGE_ROWS = {
+    "visual": (VisualSegment, visual_rows),
+    "voice": (VoiceSegment, voice_rows),
+    "entities": (Entity, entity_rows),
+    "fact_checks": (FactCheck, fact_check_rows),
+}
+
+
+async def reset_stages(db: AsyncSession, analysis: Analysis):
+    """Drop rows left by an earlier attempt and mark the analysis processing.
+
+    An analysis that had completed loses its status and completed_at (and so
+    its ETag), so its now half-empty results are never served as cached.
+    """
+    try:
+        for model, _ in STAGE_ROWS.values():
+            await db.execute(delete(model).where(model.analysis_id == analysis.id))
+        analysis.stage_status = dict.fromkeys(STAGE_ROWS, "pending")
+        analysis.status = "processing"
+        analysis.completed_at = None
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    response_cache.completed_analyses.invalidate(analysis.id)
+
+
+async def store_stage(db: AsyncSession, analysis: Analysis, stage: str, value: list[dict]):
+    """Insert one stage's rows and mark it completed in one transaction."""
+    model, build_rows = STAGE_ROWS[stage]
+    rows = build_rows(analysis.id, value or [])
+    try:
+        if rows:
+            await db.execute(insert(model), rows)
+        analysis.stage_status = {**(analysis.stage_status or {}), stage: "completed"}
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        # The rollback expired `analysis`; reload it before the next stage uses it
+        await db.refresh(analysis)
+        raise
+    logger.info(f"Stored {len(rows)} {stage} rows for {analysis.id}")
+
+
+async def append_results(
+    db: AsyncSession,
+    analysis: Analysis,
+    results: dict[str, list[dict]],
+    summary: Optional[str] = None,
+):
+    """Append rows for some stages of a live analysis in one transaction.
+
+    The stages stay "streaming" until the session ends and store_results()
+    marks them and the analysis completed.
+    """
+    stage_status = dict(analysis.stage_status or {})
+    stored = 0
+    try:
+        for stage, value in results.items():
+            model, build_rows = STAGE_ROWS[stage]
+            rows = build_rows(analysis.id, value)
+            if rows:
+                await db.execute(insert(model), rows)
+            stage_status[stage] = "streaming"
+            stored += len(rows)
+        analysis.stage_status = stage_status
+        if summary is not None:
+            analysis.summary = summary
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        await db.refresh(analysis)
+        raise
+    logger.info(f"Appended {stored} result rows to {analysis.id}")
+
+
+async def store_results(
+    db: AsyncSession,
+    analysis: Analysis,
+    results: dict[str, list[dict]],
+    summary: str,
+):
+    """Write any stage not yet stored and mark the analysis completed.
+
+    Stages are normally persisted by store_stage() as they finish; this only
+    catches ones whose incremental write failed. Each such table gets a
+    single executemany insert, and everything commits in one transaction.
+    """
+    started = time.monotonic()
+    stage_status = dict(analysis.stage_status or {})
+    stored = 0
+    try:
+        for stage, (model, build_rows) in STAGE_ROWS.items():
+            if stage_status.get(stage) == "completed":
+                continue
+            rows = build_rows(analysis.id, results.get(stage) or [])
+            if rows:
+                await db.execute(insert(model), rows)
+            stage_status[stage] = "completed"
+            stored += len(rows)
+        analysis.stage_status = stage_status
+        analysis.summary = summary
+        analysis.status = "completed"
+        analysis.completed_at = datetime.utcnow()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info(
+        f"Completed {analysis.id} ({stored} late result rows) "
+        f"in {(time.monotonic() - started) * 1000:.0f}ms"
+    )
@@ -2,15 +2,39 @@ import asyncio
 import base64
 import logging
 
-import httpx
-
 from config import settings
+from services import frame_cache, http_clients
+from utils import fallbacks
+from utils.frame_hash import collapse_runs, dhash
+from utils.polling import Poller, PollTimeout
+from utils.retry import retry_async
+from utils.upload import MultipartFileStream
 
 logger = logging.getLogger(__name__)
 
 VISION_API_URL = "https://vision-agent.api.reka.ai"
 
 
+async def _fetch_video_status(video_id: str) -> dict:
+    response = await http_clients.get_client("reka_vision").get(
+        f"{VISION_API_URL}/v1/videos/{video_id}",
+        headers={"X-Api-Key": settings.reka_api_key},
+    )
+    response.raise_for_status()
+    data = response.json()
+    logger.info(f"Video {video_id} status: {data.get('status')}")
+    return data
+
+
+_video_poller = Poller(
+    _fetch_video_status,
+    terminal_states={"ready", "error"},
+    initial_delay=settings.poll_initial_delay_seconds,
+    max_delay=settings.poll_max_delay_seconds,
+    name="Reka video",
+)
+
+
 async def analyze_video_vision_api(video_path: str, question: str = "") -> list[dict]:
     """Analyze video using Reka Vision API (upload + Q&A)."""
     if not settings.reka_api_key:
@@ -21,152 +45,177 @@ async def analyze_video_vision_api(video_path: str, question: str = "") -> list[
         question = "Analyze this earnings call. For each segment describe: 1) What is shown (slide, chart, speaker) 2) Key data visible 3) Speaker expressions. Return as JSON array with timestamp, content_type, description."
 
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            # Step 1: Upload video
-            with open(video_path, "rb") as f:
-                video_data = f.read()
-
-            files = {"file": ("video.mp4", video_data, "video/mp4")}
-            data = {"video_name": "earnings_call", "index": "false"}
-
-            upload_resp = await client.post(
-                f"{VISION_API_URL}/v1/videos/upload",
-                headers={"X-Api-Key": settings.reka_api_key},
-                files=files,
-                data=data,
-            )
-
-            if upload_resp.status_code != 200:
-                logger.error(f"Vision API upload failed: {upload_resp.text}")
-                return _mock_visual_analysis(3)
-
-            video_id = upload_resp.json().get("video_id")
-            logger.info(f"Uploaded video: {video_id}")
-
-            # Step 2: Poll for ready status
-            for _ in range(60):
-                await asyncio.sleep(2)
-                status_resp = await client.get(
-                    f"{VISION_API_URL}/v1/videos/{video_id}",
-                    headers={"X-Api-Key": settings.reka_api_key},
-                )
-                status = status_resp.json().get("status")
-                logger.info(f"Video status: {status}")
-                if status == "ready":
-                    break
-                if status == "error":
-                    logger.error("Video processing failed")
-                    return _mock_visual_analysis(3)
-
-            # Step 3: Ask question
-            qa_resp = await client.post(
-                f"{VISION_API_URL}/v1/qa/chat",
-                headers={
-                    "X-Api-Key": settings.reka_api_key,
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "video_id": video_id,
-                    "question": question,
-                },
+        client = http_clients.get_client("reka_vision")
+        # Step 1: Upload video, streamed from disk
+        body = MultipartFileStream(
+            "file",
+            video_path,
+            data={"video_name": "earnings_call", "index": "false"},
+        )
+        upload_resp = await client.post(
+            f"{VISION_API_URL}/v1/videos/upload",
+            headers={"X-Api-Key": settings.reka_api_key, **body.headers},
+            content=body,
+        )
+
+        if upload_resp.status_code != 200:
+            logger.error(f"Vision API upload failed: {upload_resp.text}")
+            return _mock_visual_analysis(3)
+
+        video_id = upload_resp.json().get("video_id")
+        logger.info(f"Uploaded video: {video_id}")
+
+        # Step 2: Poll for ready status
+        try:
+            status = await _video_poller.wait(
+                video_id, settings.reka_vision_poll_deadline_seconds
             )
-
-            if qa_resp.status_code != 200:
-                logger.error(f"Vision API Q&A failed: {qa_resp.text}")
-                return _mock_visual_analysis(3)
-
-            answer = qa_resp.json().get("answer", "")
-            return [
-                {
-                    "timestamp": 0,
-                    "description": answer,
-                    "content_type": "full_analysis",
-                }
-            ]
+        except PollTimeout:
+            logger.error(f"Video {video_id} not ready before deadline")
+            return _mock_visual_analysis(3)
+        if status.get("status") == "error":
+            logger.error("Video processing failed")
+            return _mock_visual_analysis(3)
+
+        # Step 3: Ask question
+        qa_resp = await client.post(
+            f"{VISION_API_URL}/v1/qa/chat",
+            headers={
+                "X-Api-Key": settings.reka_api_key,
+                "Content-Type": "application/json",
+            },
+            json={
+                "video_id": video_id,
+                "question": question,
+            },
+        )
+
+        if qa_resp.status_code != 200:
+            logger.error(f"Vision API Q&A failed: {qa_resp.text}")
+            return _mock_visual_analysis(3)
+
+        answer = qa_resp.json().get("answer", "")
+        return [
+            {
+                "timestamp": 0,
+                "description": answer,
+                "content_type": "full_analysis",
+            }
+        ]
 
     except Exception as e:
         logger.error(f"Vision API analysis failed: {e}")
         return _mock_visual_analysis(3)
 
 
-async def analyze_video_frames(frames: list[str]) -> list[dict]:
+async def analyze_video_frames(frames: list[dict], use_mock: bool = True) -> list[dict]:
     """Analyze video frames using Reka Chat API with images.
 
-    Takes a list of frame file paths and returns visual insights for each.
-    Falls back to mock data on failure.
+    Takes `{"path", "timestamp"}` frames from utils.media and returns visual
+    insights for each.
+    Consecutive near-identical frames (by perceptual hash) are analyzed once
+    and the result is fanned back out to every frame in the run; frames seen
+    in earlier calls are served from the persistent frame cache. Remaining
+    frames are analyzed concurrently (REKA_FRAME_CONCURRENCY at a time) with
+    per-frame retries. Results are ordered by timestamp.
+    Falls back to mock data without an API key, unless `use_mock` is False.
     """
     if not settings.reka_api_key:
         logger.warning("REKA_API_KEY not set, using mock data")
-        return _mock_visual_analysis(len(frames))
+        return _mock_visual_analysis(len(frames)) if use_mock else []
+
+    hashes = await asyncio.to_thread(lambda: [dhash(f["path"]) for f in frames])
+    runs = collapse_runs(hashes, settings.frame_dedup_max_distance)
+    representatives = [run[0] for run in runs]
+
+    cached = await asyncio.to_thread(
+        frame_cache.lookup, [hashes[i] for i in representatives if hashes[i] is not None]
+    )
+    logger.info(
+        f"{len(frames)} frames -> {len(runs)} distinct shots, {len(cached)} cached"
+    )
+
+    analyses: dict[int, dict] = {}
+    fresh: dict[int, dict] = {}
+    client = http_clients.get_client("reka")
+    semaphore = asyncio.Semaphore(settings.reka_frame_concurrency)
+
+    async def _analyze(i: int):
+        if hashes[i] is not None and hashes[i] in cached:
+            analyses[i] = cached[hashes[i]]
+            return
+        try:
+            async with semaphore:
+                analyses[i] = await retry_async(
+                    lambda: _analyze_frame(client, frames[i]["path"]),
+                    attempts=settings.reka_frame_retries,
+                )
+            if hashes[i] is not None:
+                fresh[hashes[i]] = analyses[i]
+        except Exception as e:
+            logger.error(f"Reka analysis failed for frame at {frames[i]['timestamp']}s: {e}")
+            analyses[i] = {"description": f"Analysis failed: {e}", "content_type": "unknown"}
+
+    await asyncio.gather(*(_analyze(i) for i in representatives))
+    await asyncio.to_thread(frame_cache.store, fresh)
 
     results = []
-    async with httpx.AsyncClient(timeout=60) as client:
-        for i, frame_path in enumerate(frames):
-            try:
-                with open(frame_path, "rb") as f:
-                    image_data = base64.b64encode(f.read()).decode("utf-8")
-
-                response = await client.post(
-                    "https://api.reka.ai/v1/chat",
-                    headers={
-                        "X-Api-Key": settings.reka_api_key,
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "reka-flash",
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": [
-                                    {
-                                        "type": "image_url",
-                                        "image_url": "data:image/jpeg;base64,"
-                                        + image_data,
-                                    },
-                                    {
-                                        "type": "text",
-                                        "text": (
-                                            "Analyze this frame from a financial earnings call. "
-                                            "Describe what you see: Is this a slide, chart, speaker view, "
-                                            "or product demo? Extract any visible text, numbers, or data. "
-                                            "If it's a chart, describe the trend. "
-                                            "Respond in JSON format: "
-                                            '{"content_type": "slide|chart|speaker|product_demo|other", '
-                                            '"description": "...", "key_data": ["..."]}'
-                                        ),
-                                    },
-                                ],
-                            }
-                        ],
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-                content = (
-                    data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                )
+    for run in runs:
+        analysis = analyses[run[0]]
+        for i in run:
+            results.append(
+                {
+                    "timestamp": frames[i]["timestamp"],
+                    "frame_path": frames[i]["path"],
+                    "description": analysis["description"],
+                    "content_type": analysis["content_type"],
+                }
+            )
+    return sorted(results, key=lambda r: r["timestamp"])
 
-                results.append(
-                    {
-                        "timestamp": i * 30.0,
-                        "frame_path": frame_path,
-                        "description": content,
-                        "content_type": _classify_content(content),
-                    }
-                )
 
-            except Exception as e:
-                logger.error(f"Reka analysis failed for frame {i}: {e}")
-                results.append(
-                    {
-                        "timestamp": i * 30.0,
-                        "frame_path": frame_path,
-                        "description": f"Analysis failed: {e}",
-                        "content_type": "unknown",
-                    }
-                )
+async def _analyze_frame(client, frame_path: str) -> dict:
+    """Send one frame to Reka chat and return its description and content type."""
+    with open(frame_path, "rb") as f:
+        image_data = base64.b64encode(f.read()).decode("utf-8")
 
-    return results
+    response = await client.post(
+        "https://api.reka.ai/v1/chat",
+        headers={
+            "X-Api-Key": settings.reka_api_key,
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": "reka-flash",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image_url",
+                            "image_url": "data:image/jpeg;base64," + image_data,
+                        },
+                        {
+                            "type": "text",
+                            "text": (
+                                "Analyze this frame from a financial earnings call. "
+                                "Describe what you see: Is this a slide, chart, speaker view, "
+                                "or product demo? Extract any visible text, numbers, or data. "
+                                "If it's a chart, describe the trend. "
+                                "Respond in JSON format: "
+                                '{"content_type": "slide|chart|speaker|product_demo|other", '
+                                '"description": "...", "key_data": ["..."]}'
+                            ),
+                        },
+                    ],
+                }
+            ],
+        },
+    )
+    response.raise_for_status()
+    data = response.json()
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    return {"description": content, "content_type": _classify_content(content)}
 
 
 async def analyze_video_url(video_url: str) -> list[dict]:
@@ -176,46 +225,46 @@ async def analyze_video_url(video_url: str) -> list[dict]:
         return _mock_visual_analysis(5)
 
     try:
-        async with httpx.AsyncClient(timeout=120) as client:
-            response = await client.post(
-                "https://api.reka.ai/v1/chat",
-                headers={
-                    "X-Api-Key": settings.reka_api_key,
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "reka-flash",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "video_url", "video_url": video_url},
-                                {
-                                    "type": "text",
-                                    "text": (
-                                        "Analyze this earnings call video. For each distinct segment, describe: "
-                                        "1) What is shown (slide, chart, speaker, etc.) "
-                                        "2) Key data points visible "
-                                        "3) Important visual changes "
-                                        "Return a JSON array of segments with timestamp, content_type, "
-                                        "description, and key_data fields."
-                                    ),
-                                },
-                            ],
-                        }
-                    ],
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            return [
-                {
-                    "timestamp": 0,
-                    "description": content,
-                    "content_type": "full_analysis",
-                }
-            ]
+        client = http_clients.get_client("reka")
+        response = await client.post(
+            "https://api.reka.ai/v1/chat",
+            headers={
+                "X-Api-Key": settings.reka_api_key,
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": "reka-flash",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "video_url", "video_url": video_url},
+                            {
+                                "type": "text",
+                                "text": (
+                                    "Analyze this earnings call video. For each distinct segment, describe: "
+                                    "1) What is shown (slide, chart, speaker, etc.) "
+                                    "2) Key data points visible "
+                                    "3) Important visual changes "
+                                    "Return a JSON array of segments with timestamp, content_type, "
+                                    "description, and key_data fields."
+                                ),
+                            },
+                        ],
+                    }
+                ],
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        return [
+            {
+                "timestamp": 0,
+                "description": content,
+                "content_type": "full_analysis",
+            }
+        ]
 
     except Exception as e:
         logger.error(f"Reka video URL analysis failed: {e}")
@@ -237,6 +286,7 @@ def _classify_content(description: str) -> str:
 
 def _mock_visual_analysis(count: int) -> list[dict]:
     """Return mock data for development without API key."""
+    fallbacks.record("reka")
     mock_segments = [
         {
             "timestamp": 0.0,
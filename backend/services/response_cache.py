@@ -0,0 +1,69 @@
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from config import settings
+
+
+def analysis_etag(analysis_id: str, completed_at: Optional[datetime]) -> str:
+    """Strong ETag for a completed analysis.
+
+    A completed analysis only changes when a stage is re-run, which stamps a
+    new completed_at, so (id, completed_at) identifies the exact response
+    body and the ETag can be checked without building it.
+    """
+    version = f"{analysis_id}:{completed_at.isoformat() if completed_at else ''}"
+    return f'"{hashlib.sha256(version.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ResponseLRU:
+    """Serialized responses keyed by id, bounded by entry count and total bytes.
+
+    Each entry remembers the ETag it was built for; a lookup with a different
+    ETag (the analysis was re-run) drops the stale entry.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != etag:
+            self.invalidate(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        self.invalidate(key)
+        self._entries[key] = (etag, body)
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def invalidate(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+completed_analyses = ResponseLRU(
+    max_entries=settings.analysis_cache_entries,
+    max_bytes=settings.analysis_cache_max_bytes,
+)
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.database import Analysis, Entity, FactCheck, VisualSegment, VoiceSegment
+from services import persistence
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be"}
+YOUTUBE_PATH_ID = re.compile(r"^/(?:shorts|live|embed|v)/([\w-]{11})")
+TRACKING_PARAMS = {"si", "feature", "t", "start", "pp", "ab_channel", "fbclid", "gclid"}
+
+CHILD_MODELS = {
+    "entities": (Entity, ["name", "entity_type", "context", "confidence"]),
+    "voice_segments": (
+        VoiceSegment,
+        ["start_time", "end_time", "speaker", "confidence_score", "tone", "transcript"],
+    ),
+    "visual_segments": (
+        VisualSegment,
+        ["timestamp", "frame_url", "description", "content_type"],
+    ),
+    "fact_checks": (FactCheck, ["claim", "verdict", "evidence", "sources"]),
+}
+
+
+def normalize_url(url: str) -> str:
+    """Reduce a submitted URL to a stable cache key.
+
+    YouTube links collapse to `youtube:<video id>` so watch/short/embed/youtu.be
+    variants match the key built from yt-dlp metadata. Other URLs keep scheme,
+    host and path with tracking parameters dropped and the query sorted.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = dict(parse_qsl(parts.query))
+
+    if host in YOUTUBE_HOSTS:
+        if host == "youtu.be" and len(parts.path) > 1:
+            return f"youtube:{parts.path.lstrip('/').split('/')[0]}"
+        if query.get("v"):
+            return f"youtube:{query['v']}"
+        match = YOUTUBE_PATH_ID.match(parts.path)
+        if match:
+            return f"youtube:{match.group(1)}"
+
+    kept = sorted(
+        (k, v)
+        for k, v in query.items()
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    return urlunsplit(
+        (parts.scheme.lower() or "https", host, parts.path.rstrip("/"), urlencode(kept), "")
+    )
+
+
+def source_key_from_info(info: dict) -> Optional[str]:
+    """Build the cache key from yt-dlp metadata (extractor + video id).
+
+    None for direct media links: the generic extractor's id is just the
+    file's basename, so `a.com/webcast.mp4` and `b.com/webcast.mp4` would
+    share a key. Those are matched by normalized URL instead.
+    """
+    if not info or not info.get("id"):
+        return None
+    extractor = (info.get("extractor_key") or info.get("extractor") or "generic").lower()
+    if extractor == "generic":
+        return None
+    return f"{extractor}:{info['id']}"
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a media file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_cached(
+    db: Session,
+    source_keys: Optional[list[str]] = None,
+    media_hash: Optional[str] = None,
+    exclude_id: Optional[str] = None,
+) -> Optional[Analysis]:
+    """Most recent completed analysis for the same source or media within the TTL.
+
+    Runs that fell back to mock data for any stage are never reused.
+    """
+    source_keys = [k for k in (source_keys or []) if k]
+    if not source_keys and not media_hash:
+        return None
+
+    query = db.query(Analysis).filter(
+        Analysis.status == "completed", Analysis.used_mock_data.is_not(True)
+    )
+    if source_keys:
+        query = query.filter(
+            or_(Analysis.source_key.in_(source_keys), Analysis.extractor_key.in_(source_keys))
+        )
+    if media_hash:
+        query = query.filter(Analysis.media_hash == media_hash)
+    if exclude_id:
+        query = query.filter(Analysis.id != exclude_id)
+    if settings.result_cache_ttl_hours > 0:
+        cutoff = datetime.utcnow() - timedelta(hours=settings.result_cache_ttl_hours)
+        query = query.filter(Analysis.completed_at >= cutoff)
+    return query.order_by(Analysis.completed_at.desc()).first()
+
+
+def clone_analysis(db: Session, source: Analysis, target: Analysis):
+    """Copy a completed analysis's results onto `target` and mark it completed.
+
+    Child rows are copied with one executemany insert per table. The caller
+    owns the commit.
+    """
+    for relationship_name, (model, columns) in CHILD_MODELS.items():
+        rows = [
+            {"analysis_id": target.id, **{c: getattr(child, c) for c in columns}}
+            for child in getattr(source, relationship_name)
+        ]
+        if rows:
+            db.execute(insert(model), rows)
+
+    target.summary = source.summary
+    target.source_key = target.source_key or source.source_key
+    target.extractor_key = target.extractor_key or source.extractor_key
+    target.media_hash = source.media_hash
+    target.stage_status = dict.fromkeys(persistence.STAGE_ROWS, "completed")
+    target.status = "completed"
+    target.completed_at = datetime.utcnow()
+    logger.info(f"Analysis {target.id} served from cache of {source.id}")
@@ -0,0 +1,203 @@
+"""Speech-to-text for the transcript stage.
+
+Backends (TRANSCRIPTION_BACKEND):
+  modulate  the voice stage's Velma-2 utterances (see from_voice); the call
+            is uploaded to Modulate once for both stages
+  local     faster-whisper in a process pool (optional dependency)
+  stub      deterministic stand-in that runs through the same process pool
+  auto      modulate with an API key, else local if installed, else none
+
+For the pool backends the call's WAV is split at pauses (utils.vad) into
+chunks of about TRANSCRIPTION_CHUNK_SECONDS, the chunks are transcribed in
+parallel and the results are stitched back into one timestamped transcript.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional
+
+from config import settings
+from utils import vad
+
+logger = logging.getLogger(__name__)
+
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    path: str
+    start: float
+    end: float
+
+
+# Chunk engines run in pool processes, so they are module-level functions
+# taking (chunk_path, model_name) and returning (start, end, text) tuples.
+_whisper_model = None
+
+
+def _whisper_transcribe(path: str, model_name: str) -> list[tuple[float, float, str]]:
+    global _whisper_model
+    if _whisper_model is None:
+        from faster_whisper import WhisperModel
+
+        _whisper_model = WhisperModel(model_name, device="cpu", compute_type="int8")
+    segments, _ = _whisper_model.transcribe(path, beam_size=1)
+    return [(seg.start, seg.end, seg.text.strip()) for seg in segments]
+
+
+def _stub_transcribe(path: str, model_name: str) -> list[tuple[float, float, str]]:
+    """Describe the chunk instead of transcribing it; same audio, same text."""
+    samples, rate = vad.read_wav(path)
+    seconds = len(samples) / rate
+    digest = hashlib.sha256(samples.tobytes()).hexdigest()[:8]
+    return [
+        (
+            0.0,
+            seconds,
+            f"Segment {digest} runs {seconds:.1f} seconds at {vad.level_dbfs(samples):.0f} dBFS.",
+        )
+    ]
+
+
+POOL_ENGINES = {"local": _whisper_transcribe, "stub": _stub_transcribe}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Process-wide pool; each process loads the local model once."""
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the worker has an event loop and threads running
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.transcription_local_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _resolve_backend() -> Optional[str]:
+    backend = settings.transcription_backend
+    if backend == "auto":
+        if settings.modulate_api_key:
+            return "modulate"
+        return "local" if FASTER_WHISPER_AVAILABLE else None
+    if backend == "modulate" and not settings.modulate_api_key:
+        logger.warning("MODULATE_API_KEY not set, no transcription")
+        return None
+    if backend == "local" and not FASTER_WHISPER_AVAILABLE:
+        logger.warning("faster-whisper is not installed, no transcription")
+        return None
+    if backend not in ("modulate", *POOL_ENGINES):
+        logger.warning(f"Unknown TRANSCRIPTION_BACKEND '{backend}', no transcription")
+        return None
+    return backend
+
+
+def _write_chunks(audio_path: str, chunk_dir: str) -> list[AudioChunk]:
+    samples, rate = vad.read_wav(audio_path)
+    chunks = []
+    for i, (start, end) in enumerate(
+        vad.speech_chunks(
+            samples,
+            rate,
+            target_seconds=settings.transcription_chunk_seconds,
+            max_seconds=settings.transcription_max_chunk_seconds,
+        )
+    ):
+        path = os.path.join(chunk_dir, f"chunk_{i:04d}.wav")
+        vad.write_wav(path, samples[start:end], rate)
+        chunks.append(AudioChunk(path=path, start=start / rate, end=end / rate))
+    return chunks
+
+
+async def _transcribe_chunks(backend: str, chunks: list[AudioChunk]) -> list:
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    engine = POOL_ENGINES[backend]
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, engine, chunk.path, settings.whisper_model)
+            for chunk in chunks
+        ),
+        return_exceptions=True,
+    )
+    if any(isinstance(r, BrokenProcessPool) for r in results):
+        logger.error("Transcription process pool died, restarting it for the next call")
+        shutdown()
+    return results
+
+
+async def transcribe(audio_path: Optional[str]) -> list[dict]:
+    """Transcribe a 16 kHz mono WAV as parallel pause-aligned chunks.
+
+    Returns `{"start_time", "end_time", "text"}` segments in call order, with
+    times in seconds from the start of the call, or [] when there is no
+    audio or no pool backend. A chunk that fails is logged and left out.
+    """
+    backend = _resolve_backend()
+    if backend not in POOL_ENGINES or not audio_path:
+        return []
+
+    started = time.monotonic()
+    chunk_dir = tempfile.mkdtemp(prefix="chunks_", dir=os.path.dirname(audio_path))
+    try:
+        chunks = await asyncio.to_thread(_write_chunks, audio_path, chunk_dir)
+        results = await _transcribe_chunks(backend, chunks)
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    segments = []
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Transcribing chunk at {chunk.start:.1f}s failed: {result}")
+            continue
+        for start, end, text in result:
+            if text.strip():
+                segments.append(
+                    {
+                        "start_time": round(chunk.start + start, 2),
+                        "end_time": round(min(chunk.start + end, chunk.end), 2),
+                        "text": text.strip(),
+                    }
+                )
+    logger.info(
+        f"Transcribed {len(chunks)} chunks with {backend} into {len(segments)} segments "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return segments
+
+
+def from_voice(segments: list[dict]) -> list[dict]:
+    """Transcript segments from the voice stage's utterances."""
+    return [
+        {
+            "start_time": seg.get("start_time", 0),
+            "end_time": seg.get("end_time", 0),
+            "text": seg["transcript"].strip(),
+        }
+        for seg in segments
+        if (seg.get("transcript") or "").strip()
+    ]
+
+
+def transcript_text(segments: list[dict]) -> str:
+    return " ".join(seg["text"] for seg in segments)
@@ -1,96 +1,219 @@
 import asyncio
 import json
 import logging
-
-import httpx
+import weakref
+from collections import Counter
+from typing import Awaitable, Callable, Optional
 
 from config import settings
+from services import fact_cache, http_clients
+from utils import fallbacks
+from utils.claims import claim_fingerprint, cluster_claims
+from utils.polling import Poller, PollTimeout
+from utils.rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 YUTORI_BASE_URL = "https://api.yutori.com"
 
 
-async def fact_check_claims(claims: list[dict]) -> list[dict]:
+# Shared by every analysis in the worker process. Each of the
+# WORKER_PROCESSES workers gets an equal share, so together they stay
+# within the configured quota.
+_worker_share = max(settings.worker_processes, 1)
+_task_rate_limit = TokenBucket(
+    rate=settings.yutori_requests_per_minute / 60.0 / _worker_share,
+    capacity=max(settings.yutori_burst / _worker_share, 1),
+)
+
+# Research tasks outstanding at once across all analyses. Semaphores bind to
+# the event loop they are first used on, so there is one per loop.
+_in_flight: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _in_flight_limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _in_flight.get(loop)
+    if semaphore is None:
+        semaphore = _in_flight[loop] = asyncio.Semaphore(settings.yutori_max_in_flight)
+    return semaphore
+
+
+async def fact_check_claims(
+    claims: list[dict],
+    company: Optional[str] = None,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    use_mock: bool = True,
+) -> list[dict]:
     """Use Yutori Research API to fact-check claims from the earnings call.
 
     Takes extracted claims/entities and researches them against public data.
+    Every claim is checked, highest classification confidence first, with up to
+    YUTORI_MAX_IN_FLIGHT research tasks outstanding across every analysis in
+    the process and task creation held to the Yutori quota by a token bucket.
+
+    Claims are keyed by fingerprint (company, metric, segment, direction,
+    value, period), and near-duplicate wordings are clustered with MinHash;
+    each cluster is researched once, through its most confident claim, and
+    the verdict fans out to every member. Only the researched fingerprint goes
+    into the fact-check cache, so a wrong cluster can't outlive the run.
+    Clusters already in the cache are served from it without touching the
+    rate limiter.
+
+    `on_progress(done, total)` is awaited whenever more claims have verdicts.
+    With `use_mock=False`, no API key or no claims gives [] rather than mock data.
     """
     if not settings.yutori_api_key:
         logger.warning("YUTORI_API_KEY not set, using mock data")
-        return _mock_fact_checks()
-
-    results = []
-    async with httpx.AsyncClient(timeout=180) as client:
-        for claim in claims[:5]:  # Limit to 5 claims to avoid rate limits
-            try:
-                claim_text = claim.get("text", claim.get("name", ""))
-                
-                # Create research task
-                response = await client.post(
-                    f"{YUTORI_BASE_URL}/v1/research/tasks",
-                    headers={
-                        "X-API-KEY": settings.yutori_api_key,
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "query": f"Verify this financial claim from an earnings call: {claim_text}. Check SEC filings, financial news, and public data. Is it accurate, needs context, or misleading?",
-                    },
-                )
-                response.raise_for_status()
-                task_data = response.json()
-                task_id = task_data.get("task_id")
-                
-                if not task_id:
-                    raise ValueError("No task_id returned")
-                
-                # Poll for results (research tasks are async)
-                result = await _poll_research_task(client, task_id)
-                
-                results.append({
-                    "claim": claim_text,
-                    "verdict": _extract_verdict(result.get("result", "")),
-                    "evidence": result.get("result", "Research pending..."),
-                    "sources": json.dumps(result.get("sources", [])),
-                })
-
-            except Exception as e:
-                logger.error(f"Yutori fact-check failed for claim: {e}")
-                results.append({
-                    "claim": claim.get("text", claim.get("name", "")),
-                    "verdict": "unverified",
-                    "evidence": f"Research pending or failed: {e}",
-                    "sources": "[]",
-                })
-
-    return results if results else _mock_fact_checks()
-
-
-async def _poll_research_task(client: httpx.AsyncClient, task_id: str, max_attempts: int = 10) -> dict:
-    """Poll for research task completion."""
-    for attempt in range(max_attempts):
-        try:
-            response = await client.get(
-                f"{YUTORI_BASE_URL}/v1/research/tasks/{task_id}",
-                headers={"X-API-KEY": settings.yutori_api_key},
+        return _mock_fact_checks() if use_mock else []
+
+    if not claims:
+        return _mock_fact_checks() if use_mock else []
+
+    claims = sorted(claims, key=lambda c: c.get("confidence", 0.0), reverse=True)
+    texts = [_claim_text(claim) for claim in claims]
+    fingerprints = [claim_fingerprint(text, company) for text in texts]
+    cached = await asyncio.to_thread(fact_cache.lookup, fingerprints)
+
+    # One representative text per fingerprint, most confident first
+    unique: dict[str, str] = {}
+    for text, fingerprint in zip(texts, fingerprints):
+        unique.setdefault(fingerprint, text)
+    keys = list(unique)
+    if settings.claim_cluster_threshold > 0:
+        clusters = [
+            [keys[i] for i in members]
+            for members in cluster_claims(
+                list(unique.values()), settings.claim_cluster_threshold, company
             )
-            response.raise_for_status()
-            data = response.json()
-            
-            status = data.get("status", "")
-            if status == "completed":
-                return data
-            elif status == "failed":
-                return {"result": "Research failed", "sources": []}
-            
-            # Wait before polling again
-            await asyncio.sleep(2)
-            
-        except Exception as e:
-            logger.warning(f"Poll attempt {attempt + 1} failed: {e}")
-            await asyncio.sleep(2)
-    
-    return {"result": "Research timed out", "sources": []}
+        ]
+    else:
+        clusters = [[key] for key in keys]
+
+    verdicts: dict[str, dict] = {}
+    to_research: dict[str, list[str]] = {}
+    for cluster in clusters:
+        hit = next((cached[key] for key in cluster if key in cached), None)
+        if hit:
+            verdicts.update({key: hit for key in cluster})
+        else:
+            to_research[unique[cluster[0]]] = cluster
+    logger.info(
+        f"Fact-checking {len(claims)} claims: {len(clusters)} distinct, "
+        f"{len(clusters) - len(to_research)} cached, {len(to_research)} to research"
+    )
+
+    semaphore = _in_flight_limit()
+    fresh: dict[str, dict] = {}
+    claims_per_key = Counter(fingerprints)
+    done = sum(claims_per_key[key] for key in verdicts)
+    if on_progress:
+        await on_progress(done, len(claims))
+
+    async def _check(text: str, cluster: list[str]):
+        nonlocal done
+        async with semaphore:
+            result, completed = await _fact_check_claim(text)
+        if not completed:
+            fallbacks.record("yutori")
+        verdicts.update({key: result for key in cluster})
+        # Only the researched fingerprint is cached; clustering is a guess
+        if completed:
+            fresh[cluster[0]] = result
+        done += sum(claims_per_key[key] for key in cluster)
+        if on_progress:
+            await on_progress(done, len(claims))
+
+    await asyncio.gather(*(_check(text, cluster) for text, cluster in to_research.items()))
+    await asyncio.to_thread(fact_cache.store, fresh)
+
+    return [
+        {
+            "claim": text,
+            "verdict": verdicts[fingerprint]["verdict"],
+            "evidence": verdicts[fingerprint]["evidence"],
+            "sources": verdicts[fingerprint]["sources"],
+        }
+        for text, fingerprint in zip(texts, fingerprints)
+    ]
+
+
+def _claim_text(claim: dict) -> str:
+    return claim.get("text", claim.get("name", ""))
+
+
+async def _fact_check_claim(claim_text: str) -> tuple[dict, bool]:
+    """Research one claim; the flag is False when research didn't complete."""
+    try:
+        task_data = await _create_research_task(
+            f"Verify this financial claim from an earnings call: {claim_text}. Check SEC filings, financial news, and public data. Is it accurate, needs context, or misleading?"
+        )
+        task_id = task_data.get("task_id")
+        if not task_id:
+            raise ValueError("No task_id returned")
+
+        # Poll for results (research tasks are async)
+        result = await _poll_research_task(task_id)
+
+        return {
+            "claim": claim_text,
+            "verdict": _extract_verdict(result.get("result", "")),
+            "evidence": result.get("result", "Research pending..."),
+            "sources": json.dumps(result.get("sources", [])),
+        }, result.get("status") == "completed"
+
+    except Exception as e:
+        logger.error(f"Yutori fact-check failed for claim: {e}")
+        return {
+            "claim": claim_text,
+            "verdict": "unverified",
+            "evidence": f"Research pending or failed: {e}",
+            "sources": "[]",
+        }, False
+
+
+async def _create_research_task(query: str) -> dict:
+    """Start a research task once the rate limiter allows; returns the response body."""
+    await _task_rate_limit.acquire()
+    response = await http_clients.get_client("yutori").post(
+        f"{YUTORI_BASE_URL}/v1/research/tasks",
+        headers={
+            "X-API-KEY": settings.yutori_api_key,
+            "Content-Type": "application/json",
+        },
+        json={"query": query},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def _fetch_research_task(task_id: str) -> dict:
+    response = await http_clients.get_client("yutori").get(
+        f"{YUTORI_BASE_URL}/v1/research/tasks/{task_id}",
+        headers={"X-API-KEY": settings.yutori_api_key},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+_research_poller = Poller(
+    _fetch_research_task,
+    terminal_states={"completed", "failed"},
+    initial_delay=settings.poll_initial_delay_seconds,
+    max_delay=settings.poll_max_delay_seconds,
+    name="Yutori research task",
+)
+
+
+async def _poll_research_task(task_id: str) -> dict:
+    """Wait for a research task; all outstanding tasks share one poll loop."""
+    try:
+        data = await _research_poller.wait(task_id, settings.yutori_poll_deadline_seconds)
+    except PollTimeout:
+        return {"result": "Research timed out", "sources": []}
+    if data.get("status") == "failed":
+        return {"result": "Research failed", "sources": []}
+    return data
 
 
 async def research_entity(entity_name: str) -> dict:
@@ -99,24 +222,14 @@ async def research_entity(entity_name: str) -> dict:
         return {"entity": entity_name, "data": "Mock enrichment data"}
 
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(
-                f"{YUTORI_BASE_URL}/v1/research/tasks",
-                headers={
-                    "X-API-KEY": settings.yutori_api_key,
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "query": f"Current information about {entity_name}: stock price, recent news, market position",
-                },
-            )
-            response.raise_for_status()
-            task_data = response.json()
-            task_id = task_data.get("task_id")
-            
-            if task_id:
-                return await _poll_research_task(client, task_id)
-            return task_data
+        task_data = await _create_research_task(
+            f"Current information about {entity_name}: stock price, recent news, market position"
+        )
+        task_id = task_data.get("task_id")
+
+        if task_id:
+            return await _poll_research_task(task_id)
+        return task_data
 
     except Exception as e:
         logger.error(f"Yutori entity research failed: {e}")
@@ -136,6 +249,7 @@ def _extract_verdict(evidence: str) -> str:
 
 def _mock_fact_checks() -> list[dict]:
     """Return mock fact-check data for development."""
+    fallbacks.record("yutori")
     return [
         {
             "claim": "Total revenue reached $110.2 billion, up 23% year over year",
@@ -0,0 +1,87 @@
+from utils.claims import (
+    claim_direction,
+    claim_fingerprint,
+    claim_segment,
+    cluster_claims,
+    compatible,
+)
+
+
+def test_fingerprint_separates_segments():
+    assert claim_fingerprint("Greater China revenue grew 11% this quarter", "Apple") != (
+        claim_fingerprint("Services revenue grew 11% this quarter", "Apple")
+    )
+
+
+def test_fingerprint_separates_directions():
+    assert claim_fingerprint("Revenue grew 10% year over year", "Apple") != (
+        claim_fingerprint("Revenue declined 10% year over year", "Apple")
+    )
+
+
+def test_fingerprint_matches_restatements():
+    assert claim_fingerprint(
+        "Total revenue for the quarter reached $110.2 billion, up 23% year over year", "Apple"
+    ) == claim_fingerprint("Revenue of $110.2B, up 23% year over year", "Apple Inc.")
+    assert claim_fingerprint("Apple's services revenue rose to $23 billion", "Apple") == (
+        claim_fingerprint("Revenue from Services rose to $23 billion", "Apple")
+    )
+
+
+def test_segment_and_direction():
+    assert claim_segment("Revenue in Greater China was $20.8 billion") == "greater china"
+    assert claim_segment("We expect gross margin to improve in Q1") == ""
+    assert claim_segment("Services revenue rose while iPhone revenue fell 2%") is None
+    assert claim_direction("Gross margin was 46.9%") == "level"
+    assert claim_direction("We do not expect gross margin to improve") == "not-up"
+    assert claim_direction("Revenue was 23%") is None
+
+
+def test_unparseable_claims_fall_back_to_wording():
+    mixed = "Services revenue rose while iPhone revenue fell 2%"
+    assert claim_fingerprint(mixed, "Apple") == claim_fingerprint(mixed + ".", "Apple")
+    assert claim_fingerprint(mixed, "Apple") != (
+        claim_fingerprint("iPhone revenue fell 2% while Services revenue rose", "Apple")
+    )
+
+
+def test_negated_claim_is_not_clustered():
+    claims = [
+        "We expect gross margin to improve in Q1",
+        "We do not expect gross margin to improve in Q1",
+    ]
+    assert cluster_claims(claims, 0.5) == [[0], [1]]
+
+
+def test_cluster_rejects_direction_segment_and_period_mismatches():
+    assert not compatible("Revenue grew 10% year over year", "Revenue declined 10% year over year")
+    assert not compatible(
+        "Services revenue grew 11% this quarter", "Greater China revenue grew 11% this quarter"
+    )
+    assert not compatible("Revenue grew 8% in Q3", "Revenue grew 8% in Q4")
+    assert compatible("Apple revenue grew 8% in Q4", "Revenue grew 8% in Q4", company="Apple Inc.")
+
+
+def test_cluster_merges_paraphrases():
+    claims = [
+        "Services revenue reached an all-time record of $23.1 billion this quarter",
+        "Services revenue reached an all time record of $23.1B this quarter",
+        "Mac revenue fell 5% this quarter",
+    ]
+    assert cluster_claims(claims, 0.7) == [[0, 1], [2]]
+
+
+def test_cluster_does_not_bridge_conflicting_values():
+    claims = [
+        "Revenue grew 10% in Q3 driven by iPhone",
+        "Revenue grew in Q3 driven by iPhone",
+        "Revenue grew 12% in Q3 driven by iPhone",
+    ]
+    assert cluster_claims(claims, 0.3) == [[0, 1], [2]]
+
+
+def test_level_matches_change_with_the_same_amount():
+    level = "Revenue reached $110.2B"
+    assert compatible(level, "Record revenue of $110.2 billion, up 23%")
+    assert not compatible(level, "Record revenue of $94.9 billion, up 23%")
+    assert cluster_claims([level, "Record revenue of $110.2 billion, up 23%"], 0.3) == [[0, 1]]
@@ -0,0 +1,28 @@
+from services.fastino_service import _merge_windows
+
+
+def _entity(name, entity_type, start, confidence):
+    return {
+        "name": name,
+        "entity_type": entity_type,
+        "context": "",
+        "confidence": confidence,
+        "start": start,
+        "end": start + len(name),
+    }
+
+
+def test_merge_windows_keeps_each_name_once():
+    text = "Tim Cook opened the call. Apple grew. Tim Cook closed. Apple thanked analysts."
+    second = text.index("Tim Cook closed")
+    windows = [
+        (0, [_entity("Tim Cook", "person", 0, 0.8), _entity("Apple", "company", 26, 0.9)]),
+        (second, [_entity("Tim Cook", "person", 0, 0.95), _entity("apple", "company", 17, 0.7)]),
+    ]
+
+    merged = _merge_windows(text, windows)
+
+    assert [(e["name"], e["confidence"], e["context"]) for e in merged] == [
+        ("Tim Cook", 0.95, "Tim Cook opened the call."),
+        ("Apple", 0.9, "Apple grew."),
+    ]
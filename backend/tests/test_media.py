@@ -0,0 +1,34 @@
+import os
+
+from utils.media import _read_window_list
+
+
+def _append(segments_dir, text):
+    with open(os.path.join(segments_dir, "windows.csv"), "a") as f:
+        f.write(text)
+
+
+def test_window_list_missing(tmp_path):
+    assert _read_window_list(str(tmp_path)) == ([], 0)
+
+
+def test_window_list_leaves_partial_line_for_next_read(tmp_path):
+    segments_dir = str(tmp_path)
+    _append(segments_dir, "window_00000.mkv,0.000000,30.000000\nwindow_00001.mkv,30.0")
+
+    windows, offset = _read_window_list(segments_dir)
+    assert [(w.index, w.start, w.end) for w in windows] == [(0, 0.0, 30.0)]
+    assert windows[0].path == os.path.join(segments_dir, "window_00000.mkv")
+
+    _append(segments_dir, "00000,60.000000\n")
+    windows, offset = _read_window_list(segments_dir, offset, first_index=1)
+    assert [(w.index, w.start, w.end) for w in windows] == [(1, 30.0, 60.0)]
+    assert _read_window_list(segments_dir, offset, first_index=2) == ([], offset)
+
+
+def test_window_list_skips_unreadable_lines(tmp_path):
+    segments_dir = str(tmp_path)
+    _append(segments_dir, "garbage\nwindow_00000.mkv,0.0,30.0\n")
+
+    windows, _ = _read_window_list(segments_dir)
+    assert [(w.index, w.path.endswith("window_00000.mkv")) for w in windows] == [(0, True)]
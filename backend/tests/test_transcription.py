@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from config import settings
+from services import transcription
+from utils import vad
+
+RATE = 16000
+
+
+@pytest.fixture
+def stub_backend(monkeypatch):
+    monkeypatch.setattr(settings, "transcription_backend", "stub")
+    monkeypatch.setattr(settings, "transcription_chunk_seconds", 4.0)
+    monkeypatch.setattr(settings, "transcription_max_chunk_seconds", 6.0)
+    monkeypatch.setattr(settings, "transcription_local_workers", 2)
+    yield
+    transcription.shutdown()
+
+
+def _write_call(path: str):
+    """22 seconds: three- and four-second tones, each followed by a 1s pause."""
+    rng = np.random.default_rng(0)
+    parts = []
+    for i, seconds in enumerate([3, 4, 3, 4, 3]):
+        tone = np.arange(int(seconds * RATE)) / RATE
+        parts.append((0.3 * np.sin(2 * np.pi * (200 + 40 * i) * tone) * 32767).astype(np.int16))
+        parts.append(rng.normal(0, 30, RATE).astype(np.int16))
+    vad.write_wav(path, np.concatenate(parts), RATE)
+
+
+def test_stub_segments_are_ordered_and_deterministic(stub_backend, tmp_path):
+    audio = str(tmp_path / "call.wav")
+    _write_call(audio)
+
+    first = asyncio.run(transcription.transcribe(audio))
+    second = asyncio.run(transcription.transcribe(audio))
+
+    assert first == second
+    assert len(first) > 1
+    starts = [seg["start_time"] for seg in first]
+    assert starts == sorted(starts) and starts[0] == 0.0
+    for seg, following in zip(first, first[1:]):
+        assert seg["end_time"] == pytest.approx(following["start_time"], abs=0.01)
+    assert first[-1]["end_time"] == pytest.approx(22.0, abs=0.01)
+    assert [p.name for p in tmp_path.iterdir()] == ["call.wav"]
+
+
+def test_no_audio_or_backend(monkeypatch):
+    monkeypatch.setattr(settings, "transcription_backend", "stub")
+    assert asyncio.run(transcription.transcribe(None)) == []
+    monkeypatch.setattr(settings, "transcription_backend", "modulate")
+    monkeypatch.setattr(settings, "modulate_api_key", "key")
+    assert asyncio.run(transcription.transcribe("/nonexistent.wav")) == []
+
+
+def test_from_voice_keeps_spoken_utterances():
+    voice = [
+        {"start_time": 0.0, "end_time": 2.5, "transcript": " Good afternoon. "},
+        {"start_time": 2.5, "end_time": 3.0, "transcript": ""},
+        {"start_time": 3.0, "end_time": 6.0, "transcript": "Revenue grew 8%."},
+    ]
+    segments = transcription.from_voice(voice)
+    assert segments == [
+        {"start_time": 0.0, "end_time": 2.5, "text": "Good afternoon."},
+        {"start_time": 3.0, "end_time": 6.0, "text": "Revenue grew 8%."},
+    ]
+    assert transcription.transcript_text(segments) == "Good afternoon. Revenue grew 8%."
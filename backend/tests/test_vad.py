@@ -0,0 +1,55 @@
+import numpy as np
+
+from utils import vad
+
+RATE = 16000
+
+
+def _speech(seconds: float, pitch: float = 220.0) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * pitch * t) * 32767).astype(np.int16)
+
+
+def _pause(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0, 30, int(seconds * RATE)).astype(np.int16)
+
+
+def _call(*parts: tuple[float, float]) -> tuple[np.ndarray, list[float]]:
+    """Speech/pause pairs, and the midpoint of each pause in seconds."""
+    samples, pauses, t = [], [], 0.0
+    for speech, pause in parts:
+        samples += [_speech(speech), _pause(pause)]
+        t += speech
+        if pause:
+            pauses.append(t + pause / 2)
+        t += pause
+    return np.concatenate(samples), pauses
+
+
+def test_chunks_end_in_pauses():
+    samples, pauses = _call((8, 0.8), (7, 1.5), (9, 0.5), (12, 1.0), (6, 0.1), (10, 0))
+    chunks = vad.speech_chunks(samples, RATE, target_seconds=15, max_seconds=25)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(samples)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+        assert min(abs(end / RATE - p) for p in pauses) < 0.1
+    assert all((end - start) / RATE <= 25 for start, end in chunks)
+
+
+def test_longest_pause_in_range_wins():
+    samples, _ = _call((8, 0.4), (3, 1.5), (10, 0))
+    (first, _), (cut, _) = vad.speech_chunks(samples, RATE, target_seconds=10, max_seconds=20)
+    assert first == 0
+    # The 1.5s pause after 11.4s beats the 0.4s one at 8s, though both are in range
+    assert abs(cut / RATE - 12.15) < 0.1
+
+
+def test_no_pause_cuts_at_max():
+    chunks = vad.speech_chunks(_speech(70), RATE, target_seconds=30, max_seconds=60)
+    assert [round(start / RATE) for start, _ in chunks] == [0, 60]
+
+
+def test_silence_has_no_chunks():
+    assert vad.speech_chunks(np.zeros(RATE * 5, dtype=np.int16), RATE) == []
+    assert vad.speech_chunks(np.zeros(10, dtype=np.int16), RATE) == []
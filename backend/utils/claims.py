@@ -0,0 +1,322 @@
+import hashlib
+import re
+from typing import Optional
+
+from utils.minhash import MinHasher, union_clusters
+
+SCALES = {
+    "trillion": 1e12, "tn": 1e12, "t": 1e12,
+    "billion": 1e9, "bn": 1e9, "b": 1e9,
+    "million": 1e6, "mn": 1e6, "mm": 1e6, "m": 1e6,
+    "thousand": 1e3, "k": 1e3,
+}
+
+VALUE = re.compile(
+    r"(?P<currency>\$)?\s*(?<![\w.])(?P<number>\d[\d,]*(?:\.\d+)?)\s*"
+    r"(?P<unit>%|percent\b|basis points\b|bps\b|"
+    r"trillion\b|billion\b|million\b|thousand\b|tn\b|bn\b|mn\b|mm\b|[tbmk]\b)?",
+    re.IGNORECASE,
+)
+
+# Canonical metric -> phrases that name it (plurals match too)
+METRICS = {
+    "gross_margin": ["gross margin"],
+    "operating_margin": ["operating margin"],
+    "operating_income": ["operating income", "operating profit"],
+    "net_income": ["net income", "net profit"],
+    "eps": ["earnings per share", "eps"],
+    "free_cash_flow": ["free cash flow"],
+    "revenue": ["revenue", "net sales", "sales", "top line"],
+    "subscriptions": ["subscriptions", "subscribers"],
+    "users": ["active users", "users", "customers"],
+    "dividend": ["dividend"],
+    "buyback": ["buyback", "repurchase"],
+    "capex": ["capital expenditure", "capex"],
+    "margin": ["margin"],
+}
+
+# Metrics stated as a percentage level rather than a change
+RATIOS = {"gross_margin", "operating_margin", "margin"}
+
+# Direction words -> signed direction of change
+DIRECTIONS = {
+    "up": [
+        "up", "grew", "grow", "grows", "growing", "growth", "increase", "increased",
+        "increases", "increasing", "rose", "rise", "rises", "higher", "gain", "gained",
+        "improve", "improved", "improves", "improvement", "expand", "expanded",
+        "expansion", "accelerate", "accelerated", "accelerating",
+    ],
+    "down": [
+        "down", "decline", "declined", "declines", "declining", "decrease", "decreased",
+        "decreases", "fell", "fall", "falls", "lower", "drop", "dropped", "shrank",
+        "shrink", "contract", "contracted", "contraction", "compress", "compressed",
+        "compression", "deteriorate", "deteriorated", "decelerate", "decelerated",
+    ],
+    "flat": ["flat", "unchanged", "stable", "steady"],
+}
+DIRECTION_WORDS = {word: d for d, words in DIRECTIONS.items() for word in words}
+NEGATION = re.compile(r"\b(?:not|no|never|neither|nor|without)\b|n't\b", re.IGNORECASE)
+
+# Words around a metric that don't narrow it to a segment ("total revenue")
+SEGMENT_NOISE = {
+    "total", "overall", "consolidated", "company", "reported", "record", "net",
+    "quarterly", "annual", "annualized", "quarter", "year", "fiscal", "full",
+    "gaap", "non", "adjusted", "its", "their", "first", "second", "third", "fourth",
+    "q1", "q2", "q3", "q4",
+}
+# Words that end a segment name: verbs, auxiliaries and conjunctions
+SEGMENT_BREAK = {
+    "do", "does", "did", "don't", "doesn't", "didn't", "not", "no", "never", "can",
+    "could", "would", "should", "may", "might", "but", "or", "so", "than", "while",
+    "expect", "expects", "expected", "anticipate", "anticipated", "believe", "see",
+    "saw", "guide", "guided", "report", "posted", "delivered", "generated", "had",
+    "achieved", "estimate", "forecast", "project", "projected", "think", "said",
+}
+SEGMENT_PREFIX = re.compile(r"((?:[a-z][\w&'-]*\s+){1,3})$")
+SEGMENT_SUFFIX = re.compile(r"^\s+(?:in|from|of)\s+((?:[a-z][\w&'-]*\s*){1,3})")
+
+QUARTER_WORDS = {"first": "q1", "second": "q2", "third": "q3", "fourth": "q4"}
+QUARTER = re.compile(
+    r"\b(?:q([1-4])|(first|second|third|fourth) quarter)\b", re.IGNORECASE
+)
+YEAR = re.compile(r"\b(?:fy\s?|fiscal (?:year )?)?((?:19|20)\d{2})\b", re.IGNORECASE)
+COMPANY_SUFFIX = re.compile(r"\b(inc|corp|corporation|co|ltd|plc|llc)\.?$", re.IGNORECASE)
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "of", "on", "our", "that", "the", "this", "to", "was", "we",
+    "were", "will", "with",
+}
+
+
+def _format(number: float) -> str:
+    return f"{number:.6g}"
+
+
+def _canonical_value(match: re.Match) -> Optional[str]:
+    """`usd:1.102e+11`, `pct:23` or `num:1e+09` for one VALUE match; None for years."""
+    number = float(match["number"].replace(",", ""))
+    unit = (match["unit"] or "").lower()
+    if unit in ("%", "percent"):
+        return f"pct:{_format(number)}"
+    if unit in ("bps", "basis points"):
+        return f"pct:{_format(number / 100)}"
+    scaled = number * SCALES.get(unit, 1)
+    if match["currency"]:
+        return f"usd:{_format(scaled)}"
+    if unit or not (1900 <= number <= 2100 and number.is_integer()):
+        return f"num:{_format(scaled)}"
+    return None
+
+
+def claim_value(text: str) -> Optional[str]:
+    """The claim's headline figure, normalized: `usd:1.102e+11`, `pct:23`, `num:1e+09`.
+
+    Currency amounts win over percentages, which win over bare numbers; years
+    are not treated as values.
+    """
+    found: dict[str, str] = {}
+    for match in VALUE.finditer(text):
+        value = _canonical_value(match)
+        if value:
+            found.setdefault(value.split(":", 1)[0], value)
+    for kind in ("usd", "pct", "num"):
+        if kind in found:
+            return found[kind]
+    return None
+
+
+def _metric_mentions(text: str) -> list[tuple[int, int, str]]:
+    """(start, end, metric) of each metric phrase, dropping ones inside a longer mention."""
+    lowered = text.lower()
+    found = [
+        (match.start(), match.end(), metric)
+        for metric, phrases in METRICS.items()
+        for phrase in phrases
+        for match in re.finditer(rf"\b{re.escape(phrase)}s?\b", lowered)
+    ]
+    # Earliest first; on a tie the longer phrase is more specific
+    found.sort(key=lambda m: (m[0], m[0] - m[1]))
+    mentions: list[tuple[int, int, str]] = []
+    for start, end, metric in found:
+        if not mentions or start >= mentions[-1][1]:
+            mentions.append((start, end, metric))
+    return mentions
+
+
+def claim_metric(text: str) -> Optional[str]:
+    mentions = _metric_mentions(text)
+    return mentions[0][2] if mentions else None
+
+
+def _segment_words(words: list[str], company_words: set[str]) -> list[str]:
+    kept = []
+    for word in words:
+        word = word.removesuffix("'s").removesuffix("'")
+        if word in STOPWORDS or word in DIRECTION_WORDS or word in SEGMENT_BREAK:
+            break
+        if word not in SEGMENT_NOISE and word not in company_words:
+            kept.append(word)
+    return kept
+
+
+def claim_segment(text: str, company: Optional[str] = None) -> Optional[str]:
+    """What part of the business the headline metric is about.
+
+    "Greater China revenue" and "revenue from Services" give `greater china`
+    and `services`; "total revenue" and "our revenue" give "" (company-wide).
+    None when there is no metric, or when the metric is mentioned for more
+    than one segment ("Services revenue rose while iPhone revenue fell").
+    """
+    mentions = _metric_mentions(text)
+    if not mentions:
+        return None
+    metric = mentions[0][2]
+    lowered = text.lower()
+    company_words = set(normalize_company(company).split())
+    segments = set()
+    for start, end, mentioned in mentions:
+        if mentioned != metric:
+            continue
+        prefix = SEGMENT_PREFIX.search(lowered[:start])
+        before = prefix[1].split() if prefix else []
+        # Read the prefix backwards from the metric so the nearest words count
+        words = _segment_words(before[::-1], company_words)[::-1]
+        suffix = SEGMENT_SUFFIX.match(lowered[end:])
+        if suffix:
+            words += _segment_words(suffix[1].split(), company_words)
+        segments.add(" ".join(words))
+    return segments.pop() if len(segments) == 1 else None
+
+
+def claim_negated(text: str) -> bool:
+    return NEGATION.search(text) is not None
+
+
+def claim_direction(text: str) -> Optional[str]:
+    """Signed direction of the change a claim reports: "up", "down" or "flat".
+
+    "level" for a claim that states an amount without a change ("revenue
+    reached $110.2B", "gross margin was 46.9%"); None when the direction
+    can't be told, because the claim uses words for more than one direction
+    or gives a bare percentage of something that isn't a margin. A negated
+    claim gets a `not-` prefix.
+    """
+    directions = {DIRECTION_WORDS[w] for w in WORD.findall(text.lower()) if w in DIRECTION_WORDS}
+    if len(directions) > 1:
+        return None
+    if directions:
+        direction = directions.pop()
+    elif (claim_value(text) or "pct:").startswith("pct:") and claim_metric(text) not in RATIOS:
+        return None
+    else:
+        direction = "level"
+    return f"not-{direction}" if claim_negated(text) else direction
+
+
+def claim_period(text: str) -> Optional[str]:
+    parts = []
+    quarter = QUARTER.search(text)
+    if quarter:
+        parts.append(f"q{quarter[1]}" if quarter[1] else QUARTER_WORDS[quarter[2].lower()])
+    year = YEAR.search(text)
+    if year:
+        parts.append(year[1])
+    return " ".join(parts) or None
+
+
+def normalize_company(company: Optional[str]) -> str:
+    name = (company or "").strip().lower().rstrip(",")
+    return COMPANY_SUFFIX.sub("", name).strip(" ,")
+
+
+def claim_fingerprint(text: str, company: Optional[str] = None) -> str:
+    """Stable key for "the same claim", however it was phrased.
+
+    A claim is identified by (company, metric, segment, direction, value,
+    period), so "revenue reached $110.2B" and "revenue of $110.2 billion"
+    agree while "Services revenue grew 11%" and "Greater China revenue grew
+    11%", or "grew 10%" and "declined 10%", don't. Claims where any of metric,
+    figure, segment or direction can't be read fall back to their normalized
+    wording.
+    """
+    metric, value = claim_metric(text), claim_value(text)
+    segment, direction = claim_segment(text, company), claim_direction(text)
+    if metric and value and segment is not None and direction:
+        key = (
+            f"{normalize_company(company)}|{metric}|{segment}|{direction}|{value}"
+            f"|{claim_period(text) or ''}"
+        )
+    else:
+        words = [w for w in WORD.findall(text.lower()) if w not in STOPWORDS]
+        key = f"{normalize_company(company)}|text|{' '.join(words)}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def claim_tokens(text: str) -> set[str]:
+    """Content words of a claim with figures in canonical form, for similarity.
+
+    "$110.2B" and "$110.2 billion" both become `usd:1.102e+11`; stopwords are
+    dropped and a trailing plural "s" is stripped.
+    """
+    tokens = set()
+
+    def _replace(match: re.Match) -> str:
+        value = _canonical_value(match)
+        if value is None:
+            return match.group(0)
+        tokens.add(value)
+        return " "
+
+    for word in WORD.findall(VALUE.sub(_replace, text).lower()):
+        if word not in STOPWORDS:
+            tokens.add(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word)
+    return tokens
+
+
+def compatible(a: str, b: str, company: Optional[str] = None) -> bool:
+    """False when two claims can't be the same claim.
+
+    They must agree on negation, and on direction, metric, segment (which
+    also tells other companies apart), period and headline figure wherever
+    both claims state one. A claim that only states a level ("revenue
+    reached $110.2B") matches one reporting a change in the same figure
+    ("revenue of $110.2 billion, up 23%") when both give that figure.
+    """
+    if claim_negated(a) != claim_negated(b):
+        return False
+    value_a, value_b = claim_value(a), claim_value(b)
+    direction_a, direction_b = claim_direction(a), claim_direction(b)
+    if direction_a and direction_b and direction_a != direction_b:
+        levels = [d.removeprefix("not-") == "level" for d in (direction_a, direction_b)]
+        if not (any(levels) and value_a and value_a == value_b):
+            return False
+    if value_a and value_b and value_a != value_b:
+        return False
+    for part in (claim_metric, claim_period):
+        part_a, part_b = part(a), part(b)
+        if part_a and part_b and part_a != part_b:
+            return False
+    segment_a, segment_b = claim_segment(a, company), claim_segment(b, company)
+    return segment_a is None or segment_b is None or segment_a == segment_b
+
+
+def cluster_claims(
+    texts: list[str], threshold: float, company: Optional[str] = None
+) -> list[list[int]]:
+    """Group near-duplicate claims (paraphrases, restatements) by index.
+
+    Candidates come from MinHash LSH over each claim's token shingles; a pair
+    joins a cluster when its estimated Jaccard similarity reaches `threshold`
+    and a claim only joins a cluster when it is compatible() with every claim
+    already in it, so a vaguer claim can't bridge two that conflict ("grew
+    10%" and "grew 12%" both match "grew"). Each cluster is listed in input
+    order, so its first index is its earliest claim.
+    """
+    shingles = [claim_tokens(text) for text in texts]
+    pairs = MinHasher().similar_pairs(shingles, threshold)
+    return union_clusters(
+        len(texts),
+        pairs,
+        can_join=lambda i, j: compatible(texts[i], texts[j], company),
+    )
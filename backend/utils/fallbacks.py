@@ -0,0 +1,33 @@
+"""Record which providers fell back to mock data during a pipeline run.
+
+The orchestrator opens `tracking()` around a run and every mock-data helper
+calls `record()`. Stage tasks inherit the run's context, so they all add to
+the same set even when several pipelines share the worker's event loop.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_used: ContextVar[Optional[set[str]]] = ContextVar("mock_fallbacks", default=None)
+
+
+@contextmanager
+def tracking() -> Iterator[set[str]]:
+    used: set[str] = set()
+    token = _used.set(used)
+    try:
+        yield used
+    finally:
+        _used.reset(token)
+
+
+def record(source: str):
+    used = _used.get()
+    if used is not None:
+        used.add(source)
+
+
+def used() -> set[str]:
+    """Providers that have fallen back so far in the current run."""
+    return set(_used.get() or ())
@@ -0,0 +1,50 @@
+import logging
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(path: str, hash_size: int = 8) -> Optional[int]:
+    """Difference hash of an image: 64 bits that survive scaling and JPEG noise.
+
+    The frame is reduced to a (hash_size + 1) x hash_size grayscale thumbnail
+    and each bit records whether a pixel is brighter than its right neighbour.
+    Returns None if the image can't be read.
+    """
+    try:
+        with Image.open(path) as image:
+            thumb = image.convert("L").resize(
+                (hash_size + 1, hash_size), Image.Resampling.BILINEAR
+            )
+        pixels = np.asarray(thumb, dtype=np.int16)
+    except Exception as e:
+        logger.warning(f"Could not hash frame {path}: {e}")
+        return None
+
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def collapse_runs(hashes: list[Optional[int]], max_distance: int) -> list[list[int]]:
+    """Group consecutive near-identical frames into runs of indices.
+
+    A frame joins the current run while it stays within `max_distance` bits of
+    the run's first frame, so a slowly drifting shot still starts a new run
+    eventually. Frames that couldn't be hashed are always their own run.
+    """
+    runs: list[list[int]] = []
+    for i, h in enumerate(hashes):
+        if runs and h is not None:
+            anchor = hashes[runs[-1][0]]
+            if anchor is not None and hamming(anchor, h) <= max_distance:
+                runs[-1].append(i)
+                continue
+        runs.append([i])
+    return runs
@@ -1,69 +1,268 @@
+import asyncio
+import json
 import logging
 import os
+import re
 import shutil
-import subprocess
 import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
 
 logger = logging.getLogger(__name__)
 
+PIPE_CHUNK_SIZE = 1024 * 1024
+YTDLP_FORMAT = "best[height<=720]"
+LIVE_POLL_SECONDS = 1.0
+LIVE_STOP_TIMEOUT = 10
+
+
+SHOWINFO_PTS = re.compile(r"showinfo.*?\bn:\s*(\d+)\s+pts:\s*-?\d+\s+pts_time:\s*(-?[\d.]+)")
+
+
+class MediaError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class FrameSampling:
+    """How frames are picked from the video.
+
+    "interval" takes one frame every `interval_seconds`. "scene" takes a frame
+    at each cut whose ffmpeg scene score exceeds `scene_threshold`, no closer
+    than `min_spacing` seconds to the previous pick and no further than
+    `max_spacing` (so long static shots still get sampled). Either way at most
+    `max_frames` are kept, thinned evenly across the call.
+    """
+
+    mode: str = "interval"
+    interval_seconds: float = 30
+    scene_threshold: float = 0.3
+    min_spacing: float = 2.0
+    max_spacing: float = 120.0
+    max_frames: int = 120
+
+    def video_filter(self) -> str:
+        if self.mode == "scene":
+            select = (
+                f"isnan(prev_selected_t)"
+                f"+gte(t-prev_selected_t,{self.max_spacing})"
+                f"+gt(scene,{self.scene_threshold})*gte(t-prev_selected_t,{self.min_spacing})"
+            )
+            return f"select='{select}',showinfo"
+        return f"fps=1/{self.interval_seconds},showinfo"
 
-def download_media(url: str) -> dict:
-    """Download video/audio from URL using yt-dlp. Returns paths to files."""
-    work_dir = tempfile.mkdtemp(prefix="echomind_")
-    output_template = os.path.join(work_dir, "%(id)s.%(ext)s")
 
+@dataclass(frozen=True)
+class MediaTimeouts:
+    """Time limits in seconds for preparing media.
+
+    `decode` covers one ffmpeg pass writing both audio and frames; the
+    streaming download+decode pass gets `download + decode`. Both grow by
+    `per_minute` for each minute of probed duration.
+    """
+
+    download: float = 300
+    decode: float = 240
+    per_minute: float = 10
+
+    def scaled(self, base: float, info: Optional[dict]) -> float:
+        minutes = ((info or {}).get("duration") or 0) / 60
+        return base + minutes * self.per_minute
+
+
+async def _run(cmd: list[str], timeout: float) -> tuple[int, bytes, bytes]:
+    """Run a subprocess without blocking the event loop."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
     try:
-        # Download video
-        result = subprocess.run(
-            [
-                "yt-dlp",
-                "--no-playlist",
-                "-f", "best[height<=720]",
-                "-o", output_template,
-                "--write-info-json",
-                url,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=300,
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return proc.returncode, stdout, stderr
+
+
+def _decode_cmd(
+    source: str, audio_file: str, frames_dir: str, sampling: FrameSampling
+) -> list[str]:
+    """One ffmpeg pass that writes 16 kHz mono WAV and sampled JPEG frames.
+
+    Runs at info log level so showinfo reports each kept frame's timestamp.
+    """
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "info", "-nostats", "-y",
+        "-i", source,
+        "-map", "0:a:0?", "-vn",
+        "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
+        audio_file,
+        "-map", "0:v:0?", "-an",
+        "-vf", sampling.video_filter(), "-vsync", "vfr",
+        os.path.join(frames_dir, "frame_%04d.jpg"),
+    ]
+
+
+def _list_frames(frames_dir: str) -> list[str]:
+    if not os.path.isdir(frames_dir):
+        return []
+    return sorted(
+        os.path.join(frames_dir, f) for f in os.listdir(frames_dir) if f.endswith(".jpg")
+    )
+
+
+def _collect_frames(frames_dir: str, ffmpeg_log: str, sampling: FrameSampling) -> list[dict]:
+    """Pair written frames with their sample times and apply the frame budget."""
+    paths = _list_frames(frames_dir)
+    times = [float(m.group(2)) for m in SHOWINFO_PTS.finditer(ffmpeg_log)]
+    if len(times) != len(paths):
+        logger.warning(
+            f"Got {len(times)} frame timestamps for {len(paths)} frames, estimating"
         )
+        times = [i * sampling.interval_seconds for i in range(len(paths))]
+    frames = [{"path": p, "timestamp": t} for p, t in zip(paths, times)]
 
-        if result.returncode != 0:
-            logger.error(f"yt-dlp failed: {result.stderr}")
-            shutil.rmtree(work_dir, ignore_errors=True)
-            return {"error": result.stderr}
+    if len(frames) <= sampling.max_frames:
+        return frames
+    keep = {
+        round(i * (len(frames) - 1) / max(sampling.max_frames - 1, 1))
+        for i in range(sampling.max_frames)
+    }
+    for i, frame in enumerate(frames):
+        if i not in keep:
+            os.remove(frame["path"])
+    return [frame for i, frame in enumerate(frames) if i in keep]
 
-        # Find the downloaded file
-        video_file = None
-        for f in os.listdir(work_dir):
-            if f.endswith((".mp4", ".webm", ".mkv")):
-                video_file = os.path.join(work_dir, f)
-                break
 
-        if not video_file:
+async def probe_media(url: str) -> dict:
+    """Resolve the video id and container extension yt-dlp will download."""
+    returncode, stdout, stderr = await _run(
+        ["yt-dlp", "--no-playlist", "-f", YTDLP_FORMAT, "-J", url],
+        timeout=60,
+    )
+    if returncode != 0:
+        raise MediaError(stderr.decode(errors="replace"))
+    return json.loads(stdout)
+
+
+async def _stream_download(
+    url: str, video_file: str, decode_cmd: list[str]
+) -> tuple[bool, str, str]:
+    """Download with yt-dlp to stdout, teeing bytes to disk and into ffmpeg.
+
+    Decoding starts with the first downloaded chunk instead of after the whole
+    file lands. Returns (decoded_ok, download_error, decode_log). If ffmpeg can't decode
+    from a pipe (e.g. MP4 with the index at the end) we keep writing the file
+    and the caller decodes from disk afterwards.
+    """
+    downloader = await asyncio.create_subprocess_exec(
+        "yt-dlp", "--no-playlist", "-f", YTDLP_FORMAT, "-o", "-", url,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    decoder = await asyncio.create_subprocess_exec(
+        *decode_cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    decoder_alive = True
+
+    async def pump():
+        nonlocal decoder_alive
+        with open(video_file, "wb") as out:
+            while chunk := await downloader.stdout.read(PIPE_CHUNK_SIZE):
+                out.write(chunk)
+                if decoder_alive:
+                    try:
+                        decoder.stdin.write(chunk)
+                        await decoder.stdin.drain()
+                    except (BrokenPipeError, ConnectionResetError):
+                        decoder_alive = False
+        if decoder_alive:
+            decoder.stdin.close()
+
+    try:
+        _, download_stderr, decode_stderr = await asyncio.gather(
+            pump(), downloader.stderr.read(), decoder.stderr.read()
+        )
+        await downloader.wait()
+        await decoder.wait()
+    except BaseException:
+        for proc in (downloader, decoder):
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        raise
+
+    decode_log = decode_stderr.decode(errors="replace")
+    if downloader.returncode != 0:
+        return False, download_stderr.decode(errors="replace"), decode_log
+    if decoder.returncode != 0:
+        logger.info(f"Streaming decode failed, will decode from disk: {decode_log[-300:]}")
+    return decoder.returncode == 0, "", decode_log
+
+
+async def download_media(
+    url: str,
+    sampling: Optional[FrameSampling] = None,
+    info: Optional[dict] = None,
+    timeouts: Optional[MediaTimeouts] = None,
+) -> dict:
+    """Download video/audio from URL and prepare it for analysis.
+
+    Audio (16 kHz mono WAV) and frames (picked per `sampling`) come out of a
+    single ffmpeg decode that runs while yt-dlp is still downloading.
+    Pass `info` from probe_media to skip resolving the URL twice.
+    Returns paths to the video and audio files, and frames as
+    `{"path", "timestamp"}` dicts.
+    """
+    sampling = sampling or FrameSampling()
+    timeouts = timeouts or MediaTimeouts()
+    work_dir = tempfile.mkdtemp(prefix="echomind_")
+
+    try:
+        info = info or await probe_media(url)
+        video_file = os.path.join(work_dir, f"{info['id']}.{info.get('ext', 'mp4')}")
+        audio_file = os.path.join(work_dir, f"{info['id']}.wav")
+        frames_dir = os.path.join(work_dir, "frames")
+        os.makedirs(frames_dir, exist_ok=True)
+        decode_cmd = _decode_cmd("pipe:0", audio_file, frames_dir, sampling)
+
+        decoded, error, decode_log = await asyncio.wait_for(
+            _stream_download(url, video_file, decode_cmd),
+            timeout=timeouts.scaled(timeouts.download + timeouts.decode, info),
+        )
+        if error:
+            logger.error(f"yt-dlp failed: {error}")
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return {"error": error}
+        if not os.path.exists(video_file) or os.path.getsize(video_file) == 0:
             shutil.rmtree(work_dir, ignore_errors=True)
             return {"error": "No video file found after download"}
 
-        # Extract audio
-        audio_file = video_file.rsplit(".", 1)[0] + ".wav"
-        subprocess.run(
-            [
-                "ffmpeg", "-i", video_file,
-                "-vn", "-acodec", "pcm_s16le",
-                "-ar", "16000", "-ac", "1",
-                audio_file, "-y",
-            ],
-            capture_output=True,
-            timeout=120,
-        )
+        if not decoded or not os.path.exists(audio_file):
+            shutil.rmtree(frames_dir, ignore_errors=True)
+            os.makedirs(frames_dir, exist_ok=True)
+            _, _, stderr = await _run(
+                _decode_cmd(video_file, audio_file, frames_dir, sampling),
+                timeout=timeouts.scaled(timeouts.decode, info),
+            )
+            decode_log = stderr.decode(errors="replace")
 
         return {
             "video_path": video_file,
             "audio_path": audio_file if os.path.exists(audio_file) else None,
+            "frames": _collect_frames(frames_dir, decode_log, sampling),
+            "info": info,
             "work_dir": work_dir,
         }
 
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         shutil.rmtree(work_dir, ignore_errors=True)
         return {"error": "Download timed out"}
     except Exception as e:
@@ -71,33 +270,221 @@ def download_media(url: str) -> dict:
         return {"error": str(e)}
 
 
-def extract_frames(video_path: str, interval_seconds: int = 30) -> list[str]:
-    """Extract frames from video at regular intervals."""
-    frames_dir = os.path.join(os.path.dirname(video_path), "frames")
-    os.makedirs(frames_dir, exist_ok=True)
+@dataclass(frozen=True)
+class StreamWindow:
+    """One finished slice of a live stream; start/end are seconds into the stream."""
+
+    index: int
+    path: str
+    start: float
+    end: float
+
 
+def _live_ingest_cmd(
+    source: str, segments_dir: str, window_seconds: float, realtime: bool = False
+) -> list[str]:
+    """ffmpeg that copies a live stream into fixed-length Matroska windows.
+
+    Stream copy keeps up with real time on any box; decoding happens per
+    window afterwards. ffmpeg appends each finished window to a CSV list with
+    its start and end time, which is what stream_windows() tails.
+    `realtime` reads the input at its native rate, so a recording played
+    from disk arrives like a broadcast would.
+    """
+    input_opts: list[str] = []
+    if realtime:
+        input_opts = ["-re"]
+    elif source.startswith(("http://", "https://")):
+        input_opts = ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"]
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", "-y",
+        *input_opts,
+        "-i", source,
+        "-map", "0:v:0?", "-map", "0:a:0?", "-c", "copy",
+        "-f", "segment", "-segment_time", str(window_seconds),
+        "-segment_format", "matroska",
+        "-segment_list", os.path.join(segments_dir, "windows.csv"),
+        "-segment_list_type", "csv",
+        "-reset_timestamps", "1",
+        os.path.join(segments_dir, "window_%05d.mkv"),
+    ]
+
+
+def _read_window_list(
+    segments_dir: str, offset: int = 0, first_index: int = 0
+) -> tuple[list[StreamWindow], int]:
+    """Windows ffmpeg has added to its segment list since byte `offset`.
+
+    ffmpeg appends to the list while we read it, so only lines that end in a
+    newline are parsed and a partial last line is left for the next call.
+    Returns the windows, numbered from `first_index`, and the offset to read
+    from next.
+    """
     try:
-        subprocess.run(
-            [
-                "ffmpeg", "-i", video_path,
-                "-vf", f"fps=1/{interval_seconds}",
-                os.path.join(frames_dir, "frame_%04d.jpg"),
-                "-y",
-            ],
-            capture_output=True,
-            timeout=120,
-        )
+        with open(os.path.join(segments_dir, "windows.csv"), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+    complete = data[: data.rfind(b"\n") + 1]
+    windows = []
+    for line in complete.decode(errors="replace").splitlines():
+        try:
+            name, start, end = line.rsplit(",", 2)
+            window = StreamWindow(
+                index=first_index + len(windows),
+                path=os.path.join(segments_dir, name),
+                start=float(start),
+                end=float(end),
+            )
+        except ValueError:
+            logger.warning(f"Skipping unreadable segment list entry: {line!r}")
+            continue
+        windows.append(window)
+    return windows, offset + len(complete)
 
-        frames = sorted(
-            os.path.join(frames_dir, f)
-            for f in os.listdir(frames_dir)
-            if f.endswith(".jpg")
-        )
-        return frames
 
-    except Exception as e:
-        logger.error(f"Frame extraction failed: {e}")
-        return []
+def _local_stream_path(source: str) -> Optional[str]:
+    if source.startswith("file://"):
+        return source[len("file://"):]
+    if source.startswith("file:"):
+        return source[len("file:"):]
+    return None
+
+
+async def _follow_file(path: str, stdin: asyncio.StreamWriter):
+    """Feed a local file to ffmpeg as it grows, like `tail -f`."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, PIPE_CHUNK_SIZE)
+            if not chunk:
+                await asyncio.sleep(LIVE_POLL_SECONDS)
+                continue
+            try:
+                stdin.write(chunk)
+                await stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+async def stream_windows(
+    source: str,
+    work_dir: str,
+    window_seconds: float,
+    idle_timeout: float,
+    max_duration: float,
+) -> AsyncIterator[StreamWindow]:
+    """Yield consecutive windows of a live stream as each one closes.
+
+    `source` is anything ffmpeg can read live (HLS, RTMP, SRT), or a `file:`
+    path: a recording, or a file another process is still writing, that
+    stands in for a stream. Ends when the stream does, when no window has
+    closed for `idle_timeout` seconds, or after `max_duration` seconds;
+    ffmpeg is stopped gracefully so the window in progress is still yielded.
+    """
+    local_path = _local_stream_path(source)
+    if local_path and not os.path.isfile(local_path):
+        raise MediaError(f"No such file: {local_path}")
+    segments_dir = os.path.join(work_dir, "windows")
+    os.makedirs(segments_dir, exist_ok=True)
+    proc = await asyncio.create_subprocess_exec(
+        *_live_ingest_cmd(
+            "pipe:0" if local_path else source,
+            segments_dir,
+            window_seconds,
+            realtime=bool(local_path),
+        ),
+        stdin=asyncio.subprocess.PIPE if local_path else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    # ffmpeg can't be stopped cleanly while it waits on a followed file, so
+    # local files are piped in and stopping is just closing its stdin
+    feeder = asyncio.create_task(_follow_file(local_path, proc.stdin)) if local_path else None
+    errors: deque[bytes] = deque(maxlen=20)
+
+    async def drain_stderr():
+        async for line in proc.stderr:
+            errors.append(line)
+
+    async def request_stop():
+        if feeder:
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
+            proc.stdin.close()
+        else:
+            proc.terminate()
+
+    stderr_task = asyncio.create_task(drain_stderr())
+    started = last_window = time.monotonic()
+    stop_requested: Optional[float] = None
+    yielded = 0
+    list_offset = 0
+    try:
+        while True:
+            exited = proc.returncode is not None
+            windows, list_offset = _read_window_list(segments_dir, list_offset, yielded)
+            for window in windows:
+                yield window
+            if windows:
+                yielded += len(windows)
+                last_window = time.monotonic()
+            if exited:
+                break
+
+            now = time.monotonic()
+            if stop_requested is None and (
+                now - last_window > idle_timeout or now - started > max_duration
+            ):
+                logger.info(f"Stopping live ingest of {source} after {now - started:.0f}s")
+                stop_requested = now
+                await request_stop()
+            elif stop_requested is not None and now - stop_requested > LIVE_STOP_TIMEOUT:
+                proc.kill()
+            await asyncio.sleep(LIVE_POLL_SECONDS)
+    finally:
+        if feeder and not feeder.done():
+            feeder.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        await stderr_task
+
+    if yielded == 0 and proc.returncode != 0 and stop_requested is None:
+        error = b"".join(errors).decode(errors="replace").strip()
+        raise MediaError(error or "Live ingest failed")
+
+
+async def decode_window(
+    window: StreamWindow, sampling: FrameSampling, timeouts: Optional[MediaTimeouts] = None
+) -> dict:
+    """Decode one window to 16 kHz WAV and sampled frames.
+
+    Frame timestamps are shifted by the window's start so they are positions
+    in the whole stream, not the window.
+    """
+    base = os.path.splitext(window.path)[0]
+    audio_file = f"{base}.wav"
+    frames_dir = f"{base}_frames"
+    os.makedirs(frames_dir, exist_ok=True)
+    _, _, stderr = await _run(
+        _decode_cmd(window.path, audio_file, frames_dir, sampling),
+        timeout=(timeouts or MediaTimeouts()).decode,
+    )
+    frames = _collect_frames(frames_dir, stderr.decode(errors="replace"), sampling)
+    return {
+        "audio_path": audio_file if os.path.exists(audio_file) else None,
+        "frames": [{**f, "timestamp": f["timestamp"] + window.start} for f in frames],
+    }
+
+
+def cleanup_window(window: StreamWindow):
+    """Delete a window's segment and decoded files once it has been analyzed."""
+    base = os.path.splitext(window.path)[0]
+    for path in (window.path, f"{base}.wav"):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(f"{base}_frames", ignore_errors=True)
 
 
 def cleanup_work_dir(work_dir: str):
@@ -0,0 +1,102 @@
+import hashlib
+from itertools import combinations
+from typing import Callable, Optional
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """MinHash signatures and LSH banding for estimating Jaccard similarity of sets.
+
+    Each of `num_perm` universal hash functions keeps the minimum value it sees
+    over a set's shingles; the fraction of matching positions between two
+    signatures estimates their Jaccard similarity. Seeded, so signatures are
+    comparable across calls and processes.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: set[str]) -> np.ndarray:
+        hashes = np.array(
+            [_shingle_hash(s) % MERSENNE_PRIME for s in shingles], dtype=np.uint64
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _bands(self, threshold: float) -> tuple[int, int]:
+        """(bands, rows) whose LSH S-curve crosses 1/2 closest to `threshold`."""
+        options = [
+            (self.num_perm // rows, rows)
+            for rows in range(1, self.num_perm + 1)
+            if self.num_perm % rows == 0
+        ]
+        return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+    def similar_pairs(self, sets: list[set[str]], threshold: float) -> list[tuple[int, int]]:
+        """Index pairs whose estimated Jaccard similarity is at least `threshold`.
+
+        LSH buckets signatures band by band so only pairs sharing a band are
+        compared, instead of all n^2 pairs.
+        """
+        signatures = {i: self.signature(s) for i, s in enumerate(sets) if s}
+        bands, rows = self._bands(threshold)
+
+        candidates: set[tuple[int, int]] = set()
+        for band in range(bands):
+            buckets: dict[bytes, list[int]] = {}
+            for i, sig in signatures.items():
+                key = sig[band * rows : (band + 1) * rows].tobytes()
+                buckets.setdefault(key, []).append(i)
+            for members in buckets.values():
+                candidates.update(combinations(members, 2))
+
+        return sorted(
+            (i, j)
+            for i, j in candidates
+            if np.mean(signatures[i] == signatures[j]) >= threshold
+        )
+
+
+def union_clusters(
+    n: int,
+    pairs: list[tuple[int, int]],
+    can_join: Optional[Callable[[int, int], bool]] = None,
+) -> list[list[int]]:
+    """Connected components of `range(n)` under `pairs`, ordered by first member.
+
+    With `can_join`, two components only merge when every pair of members
+    across them passes it, so an item compatible with two others can't
+    bridge them into one cluster. Pairs are applied earliest first.
+    """
+    parent = list(range(n))
+    members = {i: [i] for i in range(n)}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in sorted(pairs):
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        if can_join and not all(
+            can_join(a, b) for a in members[root_i] for b in members[root_j]
+        ):
+            continue
+        root, other = min(root_i, root_j), max(root_i, root_j)
+        parent[other] = root
+        members[root].extend(members.pop(other))
+
+    return sorted((sorted(m) for m in members.values()), key=lambda m: m[0])
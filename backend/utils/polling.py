@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PollTimeout(Exception):
+    """A task didn't reach a terminal state before its deadline."""
+
+
+@dataclass
+class _Pending:
+    future: asyncio.Future
+    deadline: float
+    next_at: float
+    delay: float
+    last: Optional[dict] = field(default=None)
+
+
+class Poller:
+    """Poll many provider tasks from one loop until each reaches a terminal state.
+
+    Every task gets its own exponential backoff schedule (with jitter, capped
+    at `max_delay`) and deadline. A single background loop sleeps until the
+    next task is due and polls all due tasks together, so many outstanding
+    tasks cost one timer rather than one sleeping coroutine each. Transient
+    fetch errors are logged and retried on the same schedule.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[dict]],
+        terminal_states: set[str],
+        status_key: str = "status",
+        initial_delay: float = 1.0,
+        max_delay: float = 15.0,
+        multiplier: float = 2.0,
+        name: str = "task",
+    ):
+        self.fetch = fetch
+        self.terminal_states = terminal_states
+        self.status_key = status_key
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.name = name
+        self._pending: dict[str, _Pending] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def wait(self, task_id: str, deadline_seconds: float) -> dict:
+        """Return the task's final payload, or raise PollTimeout at the deadline."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = {}
+            self._wakeup = asyncio.Event()
+            self._runner = None
+
+        now = loop.time()
+        pending = self._pending.get(task_id)
+        if pending is None:
+            pending = _Pending(
+                future=loop.create_future(),
+                deadline=now + deadline_seconds,
+                next_at=now + self._jitter(self.initial_delay),
+                delay=self.initial_delay,
+            )
+            self._pending[task_id] = pending
+            self._wakeup.set()
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+        return await asyncio.shield(pending.future)
+
+    def _jitter(self, delay: float) -> float:
+        return random.uniform(delay / 2, delay)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            self._wakeup.clear()
+            next_at = min(p.next_at for p in self._pending.values())
+            timeout = next_at - loop.time()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    continue  # a new task arrived; recompute the next due time
+                except asyncio.TimeoutError:
+                    pass
+
+            now = loop.time()
+            due = [task_id for task_id, p in self._pending.items() if p.next_at <= now]
+            await asyncio.gather(*(self._poll(task_id) for task_id in due))
+
+    async def _poll(self, task_id: str):
+        pending = self._pending[task_id]
+        loop = asyncio.get_running_loop()
+        try:
+            data = await self.fetch(task_id)
+            pending.last = data
+            status = data.get(self.status_key, "")
+            if status in self.terminal_states:
+                self._resolve(task_id, result=data)
+                return
+        except Exception as e:
+            logger.warning(f"Polling {self.name} {task_id} failed: {e}")
+
+        now = loop.time()
+        if now >= pending.deadline:
+            self._resolve(task_id, error=PollTimeout(f"{self.name} {task_id} still pending at deadline"))
+            return
+        pending.delay = min(self.max_delay, pending.delay * self.multiplier)
+        pending.next_at = min(now + self._jitter(pending.delay), pending.deadline)
+
+    def _resolve(self, task_id: str, result: Optional[dict] = None, error: Optional[Exception] = None):
+        pending = self._pending.pop(task_id)
+        if pending.future.done():
+            return
+        if error is not None:
+            pending.future.set_exception(error)
+        else:
+            pending.future.set_result(result)
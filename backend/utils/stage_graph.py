@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    deps: tuple[str, ...] = ()
+    fallback: Optional[Callable[[], Any]] = None
+
+
+class StageGraph:
+    """Minimal dependency-driven async executor.
+
+    Each stage declares the stages it needs; it starts the moment those have
+    produced a value rather than waiting on a global barrier. A stage's
+    coroutine receives its dependencies' outputs as keyword arguments.
+
+    Stages must be added after their dependencies, which keeps the graph
+    acyclic by construction. A stage that raises is logged and replaced by its
+    fallback value (or None) so one failing provider never blocks the rest.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        deps: tuple[str, ...] = (),
+        fallback: Optional[Callable[[], Any]] = None,
+    ) -> Stage:
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already defined")
+        missing = [d for d in deps if d not in self._stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on undefined stage(s): {missing}")
+        stage = Stage(name=name, fn=fn, deps=tuple(deps), fallback=fallback)
+        self._stages[name] = stage
+        return stage
+
+    async def run(
+        self,
+        on_stage_done: Optional[Callable[[str, Any, float], Awaitable[None]]] = None,
+    ) -> dict[str, Any]:
+        """Run every stage; `on_stage_done(name, value, seconds)` is awaited as each finishes."""
+        futures: dict[str, asyncio.Future] = {
+            name: asyncio.get_running_loop().create_future() for name in self._stages
+        }
+
+        async def _run_stage(stage: Stage):
+            inputs = {dep: await futures[dep] for dep in stage.deps}
+            started = time.monotonic()
+            try:
+                value = await stage.fn(**inputs)
+            except Exception as e:
+                logger.error(f"Stage '{stage.name}' failed, falling back: {e}")
+                value = stage.fallback() if stage.fallback else None
+            elapsed = time.monotonic() - started
+            logger.info(f"Stage '{stage.name}' finished in {elapsed:.2f}s")
+            futures[stage.name].set_result(value)
+            if on_stage_done:
+                try:
+                    await on_stage_done(stage.name, value, elapsed)
+                except Exception as e:
+                    logger.warning(f"Stage '{stage.name}' completion hook failed: {e}")
+
+        tasks = [asyncio.create_task(_run_stage(s)) for s in self._stages.values()]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return {name: fut.result() for name, fut in futures.items()}
@@ -0,0 +1,62 @@
+import bisect
+import re
+from typing import Optional
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def sentence_spans(text: str) -> list[tuple[int, int]]:
+    """Character spans of the sentences in `text`."""
+    spans = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def sentence_windows(
+    text: str, max_chars: int = 2000, overlap_sentences: int = 1
+) -> list[tuple[int, str]]:
+    """Split text into windows of whole sentences, overlapping by a few sentences.
+
+    Returns (offset, window_text) pairs where offset is the window's start in
+    `text`, so spans found inside a window can be mapped back. A sentence longer
+    than `max_chars` becomes its own window.
+    """
+    spans = sentence_spans(text)
+    if not spans:
+        return []
+    if len(text) <= max_chars:
+        return [(0, text)]
+
+    windows = []
+    first = 0
+    while first < len(spans):
+        last = first
+        while last + 1 < len(spans) and spans[last + 1][1] - spans[first][0] <= max_chars:
+            last += 1
+        start, end = spans[first][0], spans[last][1]
+        windows.append((start, text[start:end]))
+        if last + 1 >= len(spans):
+            break
+        first = max(last + 1 - overlap_sentences, first + 1)
+    return windows
+
+
+def sentence_at(
+    text: str, start: int, end: int, spans: Optional[list[tuple[int, int]]] = None
+) -> str:
+    """The sentence(s) surrounding the character range [start, end)."""
+    spans = spans or sentence_spans(text)
+    first = bisect.bisect_right([s[1] for s in spans], start)
+    covering = []
+    for span in spans[first:]:
+        if span[0] >= end:
+            break
+        covering.append(span)
+    if not covering:
+        return ""
+    return text[covering[0][0] : covering[-1][1]].strip()
@@ -0,0 +1,67 @@
+import asyncio
+import mimetypes
+import os
+import secrets
+from typing import Optional
+
+import httpx
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+mimetypes.add_type("video/x-matroska", ".mkv")
+mimetypes.add_type("video/webm", ".webm")
+
+
+class MultipartFileStream(httpx.AsyncByteStream):
+    """multipart/form-data body that streams one file from disk.
+
+    Memory stays bounded by UPLOAD_CHUNK_SIZE regardless of file size, file
+    reads happen off the event loop, and the total size is known up front so
+    the request goes out with a Content-Length instead of chunked encoding.
+    The stream can be iterated again (e.g. on retry); it reopens the file.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        path: str,
+        data: Optional[dict[str, str]] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ):
+        self.path = path
+        self.boundary = secrets.token_hex(16)
+        filename = filename or os.path.basename(path)
+        content_type = (
+            content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+
+        parts = []
+        for name, value in (data or {}).items():
+            parts.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        parts.append(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        self._head = "".join(parts).encode()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self.content_length = len(self._head) + os.path.getsize(path) + len(self._tail)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}",
+            "Content-Length": str(self.content_length),
+        }
+
+    async def __aiter__(self):
+        yield self._head
+        with open(self.path, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE):
+                yield chunk
+        yield self._tail
@@ -0,0 +1,122 @@
+import wave
+
+import numpy as np
+
+FRAME_SECONDS = 0.03
+# Frames quieter than this are silence whatever the recording's noise floor
+ABSOLUTE_SILENCE_DB = -60.0
+# Speech vs. pause level difference below which nothing counts as a pause
+MIN_CONTRAST_DB = 6.0
+ENERGY_BLOCK_FRAMES = 10000
+
+
+def read_wav(path: str) -> tuple[np.ndarray, int]:
+    """Samples and sample rate of a 16-bit mono PCM WAV (what utils.media writes)."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError(f"{path} is not 16-bit mono PCM")
+        rate = f.getframerate()
+        data = f.readframes(f.getnframes())
+    return np.frombuffer(data, dtype=np.int16), rate
+
+
+def write_wav(path: str, samples: np.ndarray, rate: int):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype(np.int16).tobytes())
+
+
+def level_dbfs(samples: np.ndarray) -> float:
+    """RMS level of a block of samples in dBFS."""
+    if len(samples) == 0:
+        return -np.inf
+    rms = np.sqrt(np.mean((samples.astype(np.float64) / 32768.0) ** 2))
+    return float(20 * np.log10(max(rms, 1e-10)))
+
+
+def frame_energy_db(samples: np.ndarray, rate: int) -> np.ndarray:
+    """RMS level of each FRAME_SECONDS frame, computed in blocks to bound memory."""
+    size = int(rate * FRAME_SECONDS)
+    count = len(samples) // size
+    energy = np.empty(count)
+    for first in range(0, count, ENERGY_BLOCK_FRAMES):
+        last = min(first + ENERGY_BLOCK_FRAMES, count)
+        frames = samples[first * size : last * size].astype(np.float32).reshape(-1, size)
+        rms = np.sqrt(np.mean((frames / 32768.0) ** 2, axis=1))
+        energy[first:last] = 20 * np.log10(np.maximum(rms, 1e-10))
+    return energy
+
+
+def silent_frames(energy: np.ndarray) -> np.ndarray:
+    """Which frames are pauses rather than speech.
+
+    The threshold adapts to the recording: 30% of the way from its noise
+    floor (10th percentile) to its speech level (90th percentile). A
+    recording with no such contrast has no pauses to find.
+    """
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+    floor, loud = np.percentile(energy, [10, 90])
+    if loud - floor < MIN_CONTRAST_DB:
+        return energy < ABSOLUTE_SILENCE_DB
+    threshold = floor + (loud - floor) * 0.3
+    return (energy < threshold) | (energy < ABSOLUTE_SILENCE_DB)
+
+
+def _pauses(silent: np.ndarray, min_frames: int) -> list[tuple[int, int]]:
+    """(midpoint, length) of each run of at least `min_frames` silent frames."""
+    pauses = []
+    run_start = None
+    for i, is_silent in enumerate(np.append(silent, False)):
+        if is_silent and run_start is None:
+            run_start = i
+        elif not is_silent and run_start is not None:
+            if i - run_start >= min_frames:
+                pauses.append(((run_start + i) // 2, i - run_start))
+            run_start = None
+    return pauses
+
+
+def speech_chunks(
+    samples: np.ndarray,
+    rate: int,
+    target_seconds: float = 30.0,
+    max_seconds: float = 60.0,
+    min_pause_seconds: float = 0.3,
+) -> list[tuple[int, int]]:
+    """Split audio into chunks that end in pauses, so no word is cut in half.
+
+    Each chunk ends at the longest pause between half of `target_seconds` and
+    `max_seconds` after it starts (ties go to the pause nearest the target);
+    with no pause in that range it is cut at `max_seconds`. Chunks with no
+    speech at all are dropped. Returns (start, end) sample offsets.
+    """
+    energy = frame_energy_db(samples, rate)
+    if len(energy) == 0:
+        return []
+    silent = silent_frames(energy)
+    pauses = _pauses(silent, max(int(min_pause_seconds / FRAME_SECONDS), 1))
+
+    target = int(target_seconds / FRAME_SECONDS)
+    longest = max(int(max_seconds / FRAME_SECONDS), 1)
+    bounds = []
+    start = 0
+    while len(energy) - start > longest:
+        in_range = [p for p in pauses if start + target // 2 <= p[0] <= start + longest]
+        if in_range:
+            cut = max(in_range, key=lambda p: (p[1], -abs(p[0] - start - target)))[0]
+        else:
+            cut = start + longest
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(energy)))
+
+    size = int(rate * FRAME_SECONDS)
+    chunks = []
+    for first, last in bounds:
+        if not silent[first:last].all():
+            end = len(samples) if last == len(energy) else last * size
+            chunks.append((first * size, end))
+    return chunks
@@ -0,0 +1,157 @@
+"""EchoMind Worker — Claims analysis jobs from the database queue and runs them.
+
+Each worker process runs one long-lived event loop that executes up to
+WORKER_CONCURRENCY pipelines at a time. Run several processes with
+WORKER_PROCESSES to scale across cores.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+
+from config import settings
+from models.database import SessionLocal, async_engine, engine, init_db
+from services import (
+    events,
+    fastino_service,
+    gliner_local,
+    http_clients,
+    job_queue,
+    transcription,
+)
+from services.orchestrator import run_analysis_pipeline, run_live_analysis_pipeline
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _run_job(job: dict, slots: asyncio.Semaphore, running: dict):
+    try:
+        logger.info(f"Running job {job['id']} for analysis {job['analysis_id']}")
+        if job["live"]:
+            await run_live_analysis_pipeline(job["analysis_id"], job["source_url"])
+        else:
+            await run_analysis_pipeline(
+                job["analysis_id"], job["source_url"], force_refresh=job["force_refresh"]
+            )
+        await asyncio.to_thread(_with_session, job_queue.complete, job["id"])
+    except Exception as e:
+        logger.error(f"Job {job['id']} failed: {e}")
+        await asyncio.to_thread(_with_session, job_queue.fail, job["id"], str(e))
+    finally:
+        running.pop(job["id"], None)
+        slots.release()
+
+
+async def _maintenance(running: dict, stop: asyncio.Event):
+    """Keep leases alive, recover jobs abandoned by dead workers and prune old events."""
+    interval = max(settings.job_lease_seconds / 3, 1)
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(_with_session, job_queue.heartbeat, list(running))
+            await asyncio.to_thread(
+                _with_session,
+                job_queue.requeue_stale,
+                settings.job_lease_seconds,
+                settings.job_max_attempts,
+            )
+            await events.prune(settings.events_retention_seconds)
+        except Exception as e:
+            logger.error(f"Worker maintenance failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _worker_loop(worker_id: str, concurrency: int):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    await http_clients.init_clients()
+    if fastino_service._resolve_backend() == "local":
+        try:
+            await gliner_local.get_engine().warm()
+        except Exception as e:
+            logger.error(f"Failed to load local GLiNER2 model: {e}")
+    slots = asyncio.Semaphore(concurrency)
+    running: dict[str, asyncio.Task] = {}
+    maintenance = asyncio.create_task(_maintenance(running, stop))
+    logger.info(f"Worker {worker_id} started (concurrency={concurrency})")
+
+    while not stop.is_set():
+        await slots.acquire()
+        try:
+            job = await asyncio.to_thread(_with_session, job_queue.claim_next, worker_id)
+        except Exception as e:
+            logger.error(f"Failed to claim job: {e}")
+            job = None
+
+        if job is None:
+            slots.release()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.job_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        running[job["id"]] = asyncio.create_task(_run_job(job, slots, running))
+
+    logger.info(f"Worker {worker_id} draining {len(running)} running job(s)")
+    if running:
+        await asyncio.gather(*running.values(), return_exceptions=True)
+    await maintenance
+    transcription.shutdown()
+    await http_clients.close_clients()
+    await async_engine.dispose()
+
+
+def run_worker(index: int = 0):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    asyncio.run(_worker_loop(worker_id, settings.worker_concurrency))
+
+
+def main():
+    init_db()
+    if settings.worker_processes <= 1:
+        run_worker()
+        return
+
+    # Forked workers must not share the connections init_db() left in the pool
+    engine.dispose()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(i,), name=f"echomind-worker-{i}")
+        for i in range(settings.worker_processes)
+    ]
+    for p in processes:
+        p.start()
+
+    def _forward(signum, _frame):
+        for p in processes:
+            if p.is_alive():
+                os.kill(p.pid, signum)
+
+    signal.signal(signal.SIGTERM, _forward)
+    signal.signal(signal.SIGINT, _forward)
+    for p in processes:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,67 @@
-import React, { useState, useEffect, useCallback } from 'react'
+import React, { useState, useEffect } from 'react'
 import Upload from './components/Upload'
 import Dashboard from './components/Dashboard'
-import { getAnalysis, getAnalysisStatus } from './api/client'
+import { getAnalysis, subscribeToAnalysis } from './api/client'
+
+// Pipeline stages that finish each service card below
+const SERVICE_STAGES = {
+  'Reka Vision': 'visual',
+  Modulate: 'voice',
+  Fastino: 'entities',
+  Yutori: 'fact_checks',
+}
 
 export default function App() {
   const [analysisId, setAnalysisId] = useState(null)
   const [analysis, setAnalysis] = useState(null)
   const [status, setStatus] = useState(null)
   const [error, setError] = useState(null)
-
-  const pollStatus = useCallback(async () => {
-    if (!analysisId) return
-    try {
-      const s = await getAnalysisStatus(analysisId)
-      setStatus(s.status)
-      if (s.status === 'completed' || s.status === 'failed') {
-        const full = await getAnalysis(analysisId)
-        setAnalysis(full)
-      }
-    } catch (e) {
-      setError(e.message)
-    }
-  }, [analysisId])
+  const [progress, setProgress] = useState({ stages: {}, factChecks: null, media: null, live: null })
 
   useEffect(() => {
-    if (!analysisId || status === 'completed' || status === 'failed') return
-    const interval = setInterval(pollStatus, 2000)
-    return () => clearInterval(interval)
-  }, [analysisId, status, pollStatus])
+    if (!analysisId || analysisId === 'demo' || status !== 'processing') return
+    return subscribeToAnalysis(analysisId, async (event) => {
+      if (event.type === 'started' && event.data.live) {
+        setProgress((p) => ({ ...p, live: { windows: 0, until: 0 } }))
+      } else if (event.type === 'window_completed') {
+        setProgress((p) => ({ ...p, live: { windows: event.data.index + 1, until: event.data.end } }))
+        try {
+          setAnalysis(await getAnalysis(analysisId))
+        } catch (e) {
+          setError(e.message)
+        }
+      } else if (event.type === 'media_downloaded' || event.type === 'media_failed') {
+        setProgress((p) => ({ ...p, media: event.data }))
+      } else if (event.type === 'stage_completed') {
+        setProgress((p) => ({ ...p, stages: { ...p.stages, [event.stage]: event.data } }))
+        // Result stages are stored as they finish; show them right away
+        if (Object.values(SERVICE_STAGES).includes(event.stage)) {
+          try {
+            setAnalysis(await getAnalysis(analysisId))
+          } catch (e) {
+            setError(e.message)
+          }
+        }
+      } else if (event.type === 'fact_check_progress') {
+        setProgress((p) => ({ ...p, factChecks: event.data }))
+      } else if (event.type === 'completed' || event.type === 'failed') {
+        try {
+          const full = await getAnalysis(analysisId)
+          setAnalysis(full)
+          setStatus(full.status)
+        } catch (e) {
+          setError(e.message)
+        }
+      }
+    })
+  }, [analysisId, status])
 
   function handleSubmit(id) {
     setAnalysisId(id)
     setStatus('processing')
     setAnalysis(null)
     setError(null)
+    setProgress({ stages: {}, factChecks: null, media: null, live: null })
   }
 
   function handleReset() {
@@ -94,19 +122,41 @@ export default function App() {
           <div className="flex flex-col items-center justify-center py-20">
             <div className="w-16 h-16 border-4 border-primary-600 border-t-transparent rounded-full animate-spin mb-6" />
             <h2 className="text-xl font-semibold mb-2">Analyzing Earnings Call</h2>
-            <p className="text-gray-500 text-sm">Running 4 AI services in parallel...</p>
+            <p className="text-gray-500 text-sm">
+              {progress.live
+                ? `Live: ${progress.live.windows} windows analyzed, ` +
+                  `${Math.round(progress.live.until)}s into the call`
+                : !progress.media
+                  ? 'Downloading media...'
+                  : progress.media.error
+                    ? 'Media unavailable, continuing with fallback data...'
+                    : `Running 4 AI services in parallel on ${progress.media.frames} frames...`}
+            </p>
             <div className="mt-6 flex gap-4">
               {[
                 { name: 'Reka Vision', desc: 'Analyzing video frames' },
                 { name: 'Modulate', desc: 'Voice patterns' },
                 { name: 'Fastino', desc: 'Entity extraction' },
                 { name: 'Yutori', desc: 'Fact-checking claims' },
-              ].map((svc) => (
-                <div key={svc.name} className="card text-center px-4 py-3">
-                  <div className="text-xs font-medium text-primary-400">{svc.name}</div>
-                  <div className="text-[10px] text-gray-500 mt-1">{svc.desc}</div>
-                </div>
-              ))}
+              ].map((svc) => {
+                const done = progress.stages[SERVICE_STAGES[svc.name]]
+                const checks = svc.name === 'Yutori' && progress.factChecks
+                return (
+                  <div key={svc.name} className="card text-center px-4 py-3">
+                    <div className="text-xs font-medium text-primary-400">
+                      {done ? '\u2713 ' : ''}
+                      {svc.name}
+                    </div>
+                    <div className="text-[10px] text-gray-500 mt-1">
+                      {done
+                        ? `Done in ${done.seconds}s`
+                        : checks
+                          ? `Checked ${checks.done}/${checks.total} claims`
+                          : svc.desc}
+                    </div>
+                  </div>
+                )
+              })}
             </div>
           </div>
         )}
@@ -117,7 +167,9 @@ export default function App() {
           </div>
         )}
 
-        {analysis && status === 'completed' && <Dashboard analysis={analysis} />}
+        {analysis && (status === 'completed' || status === 'processing') && (
+          <Dashboard analysis={analysis} />
+        )}
       </main>
 
       {/* Footer */}
@@ -3,11 +3,11 @@
 const _raw = import.meta.env.VITE_API_URL || ''
 const API_BASE = _raw && !_raw.startsWith('http') ? `https://${_raw}` : _raw
 
-export async function submitAnalysis(url) {
+export async function submitAnalysis(url, { live = false } = {}) {
   const res = await fetch(`${API_BASE}/api/analyze`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ url }),
+    body: JSON.stringify({ url, live }),
   })
   if (!res.ok) throw new Error(`Failed to submit: ${res.statusText}`)
   return res.json()
@@ -25,6 +25,32 @@ export async function getAnalysisStatus(id) {
   return res.json()
 }
 
+// Live pipeline progress over Server-Sent Events. onEvent gets each parsed
+// event ({ id, type, stage, data }); the browser reconnects on its own and
+// resumes from the last event id. Returns a function that closes the stream.
+const EVENT_TYPES = [
+  'started',
+  'media_downloaded',
+  'media_failed',
+  'stage_completed',
+  'fact_check_progress',
+  'window_completed',
+  'window_failed',
+  'completed',
+  'failed',
+]
+
+export function subscribeToAnalysis(id, onEvent) {
+  const source = new EventSource(`${API_BASE}/api/analysis/${id}/events`)
+  const handle = (e) => {
+    const event = JSON.parse(e.data)
+    onEvent(event)
+    if (event.type === 'completed' || event.type === 'failed') source.close()
+  }
+  EVENT_TYPES.forEach((type) => source.addEventListener(type, handle))
+  return () => source.close()
+}
+
 export async function listAnalyses() {
   const res = await fetch(`${API_BASE}/api/analyses`)
   if (!res.ok) throw new Error(`Failed to list: ${res.statusText}`)
@@ -20,7 +20,11 @@ export default function Dashboard({ analysis }) {
             )}
           </p>
         </div>
-        <span className="badge badge-verified">Completed</span>
+        {analysis.status === 'completed' ? (
+          <span className="badge badge-verified">Completed</span>
+        ) : (
+          <span className="badge badge-unverified">In progress</span>
+        )}
       </div>
 
       {/* Summary */}
@@ -3,6 +3,7 @@ import { submitAnalysis } from '../api/client'
 
 export default function Upload({ onSubmit, onDemo }) {
   const [url, setUrl] = useState('')
+  const [live, setLive] = useState(false)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
 
@@ -12,7 +13,7 @@ export default function Upload({ onSubmit, onDemo }) {
     setLoading(true)
     setError(null)
     try {
-      const result = await submitAnalysis(url.trim())
+      const result = await submitAnalysis(url.trim(), { live })
       onSubmit(result.analysis_id)
     } catch (err) {
       setError(err.message)
@@ -57,6 +58,15 @@ export default function Upload({ onSubmit, onDemo }) {
               {loading ? 'Analyzing...' : 'Analyze'}
             </button>
           </div>
+          <label className="flex items-center gap-2 text-sm text-gray-400 mt-3">
+            <input
+              type="checkbox"
+              checked={live}
+              onChange={(e) => setLive(e.target.checked)}
+              disabled={loading}
+            />
+            Live stream (HLS/RTMP) — analyze as the call happens
+          </label>
           {error && (
             <p className="text-red-400 text-sm mt-2">{error}</p>
           )}